@@ -0,0 +1,183 @@
+"""Load test for passwordservice: throughput and latency percentiles under concurrent clients.
+
+By default it starts a service in a subprocess against a throwaway vault in
+a temporary directory, so nothing touches the real vault:
+
+    python benchmarks/load_test.py --clients 64 --requests 500
+    python benchmarks/load_test.py --op lookup --entries 10000
+    python benchmarks/load_test.py --socket ./password_generator.sock   # an already running service
+
+Each client opens one connection and sends its requests back to back,
+waiting for every answer, so latency includes queueing in the service.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import vault  # noqa: E402
+from run_benchmarks import _record, result  # noqa: E402
+
+# Responses to large generate requests are long lines
+RESPONSE_LIMIT = 16 * 1024 * 1024
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def make_request(args, client, number):
+    if args.op == "lookup":
+        request = {"op": "lookup", "label": f"account-{(client * 7919 + number) % args.entries}"}
+    else:
+        request = {"op": "generate", "length": args.length, "count": args.count}
+        if args.policy:
+            request["policy"] = args.policy
+    request["id"] = number
+    if args.token:
+        request["token"] = args.token
+    return (json.dumps(request) + "\n").encode("utf-8")
+
+
+async def connect(args):
+    if args.port is not None:
+        return await asyncio.open_connection("127.0.0.1", args.port, limit=RESPONSE_LIMIT)
+    return await asyncio.open_unix_connection(args.socket, limit=RESPONSE_LIMIT)
+
+
+async def run_client(args, client, latencies, start_event):
+    reader, writer = await connect(args)
+    await start_event.wait()
+    errors = 0
+    try:
+        for number in range(args.requests):
+            line = make_request(args, client, number)
+            started = time.perf_counter()
+            writer.write(line)
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - started)
+            if not response.get("ok"):
+                errors += 1
+    finally:
+        writer.close()
+    return errors
+
+
+async def run_load(args):
+    latencies = []
+    start_event = asyncio.Event()
+    clients = [asyncio.create_task(run_client(args, client, latencies, start_event))
+               for client in range(args.clients)]
+    # Let every client connect before the clock starts
+    await asyncio.sleep(0.2)
+    started = time.perf_counter()
+    start_event.set()
+    errors = sum(await asyncio.gather(*clients))
+    return latencies, time.perf_counter() - started, errors
+
+
+async def query_stats(args):
+    reader, writer = await connect(args)
+    request = {"op": "stats"}
+    if args.token:
+        request["token"] = args.token
+    writer.write((json.dumps(request) + "\n").encode("utf-8"))
+    stats = json.loads(await reader.readline())
+    writer.close()
+    return stats
+
+
+def start_service(args, workdir):
+    """Seed a throwaway vault in workdir and start a service on it; returns the process."""
+    key = vault.get_or_create_key(os.path.join(workdir, vault.KEY_FILE))
+    v = vault.Vault(key, *(os.path.join(workdir, name)
+                           for name in (vault.RECORDS_FILE, vault.INDEX_FILE, vault.JOURNAL_FILE)))
+    v.append_many([_record(i) for i in range(args.entries)])
+    v.compact()
+
+    command = [sys.executable, os.path.join(APP_DIR, "passwordservice.py")]
+    if args.port is not None:
+        command += ["--port", str(args.port)]
+    else:
+        args.socket = os.path.join(workdir, "service.sock")
+        command += ["--socket", args.socket]
+    process = subprocess.Popen(command, cwd=workdir, stderr=subprocess.PIPE, text=True)
+    # The service announces itself on stderr once it is listening
+    line = process.stderr.readline()
+    if "listening" not in line:
+        process.kill()
+        raise RuntimeError(f"Service failed to start: {line}{process.stderr.read()}")
+    if args.port is not None:
+        with open(os.path.join(workdir, "password_service.token")) as f:
+            args.token = f.read().strip()
+    return process
+
+
+def report(args, latencies, elapsed, errors, stats):
+    latencies.sort()
+    total = len(latencies)
+    ms = [value * 1000 for value in latencies]
+    results = [
+        result("service_throughput", total / elapsed, "requests/s", op=args.op, clients=args.clients),
+        result("service_latency_p50", percentile(ms, 0.50), "ms", op=args.op, clients=args.clients),
+        result("service_latency_p90", percentile(ms, 0.90), "ms", op=args.op, clients=args.clients),
+        result("service_latency_p99", percentile(ms, 0.99), "ms", op=args.op, clients=args.clients),
+        result("service_latency_max", ms[-1], "ms", op=args.op, clients=args.clients),
+    ]
+    print(f"{total:,} {args.op} requests from {args.clients} clients in {elapsed:.2f} s "
+          f"({total / elapsed:,.0f} req/s, {errors} errors)", file=sys.stderr)
+    print(f"latency ms: mean {statistics.fmean(ms):.2f}  p50 {percentile(ms, 0.5):.2f}  "
+          f"p90 {percentile(ms, 0.9):.2f}  p99 {percentile(ms, 0.99):.2f}  max {ms[-1]:.2f}",
+          file=sys.stderr)
+    if stats.get("batches"):
+        print(f"service: {stats['requests']:,} generation requests in {stats['batches']:,} batches "
+              f"({stats['requests'] / stats['batches']:.1f} per CSPRNG draw)", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    """Run the load test and print (or write) the results."""
+    parser = argparse.ArgumentParser(description="Load test for the local password service")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent connections (default: 32)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per client (default: 500)")
+    parser.add_argument("--op", choices=("generate", "lookup"), default="generate")
+    parser.add_argument("--length", type=int, default=16, help="password length (default: 16)")
+    parser.add_argument("--count", type=int, default=1, help="passwords per request (default: 1)")
+    parser.add_argument("--policy", help="named policy to generate with")
+    parser.add_argument("--entries", type=int, default=1000,
+                        help="entries in the throwaway vault, and labels looked up (default: 1000)")
+    parser.add_argument("--socket", help="use an already running service on this Unix socket")
+    parser.add_argument("--port", type=int, help="use TCP on 127.0.0.1:PORT (starts a service unless --token)")
+    parser.add_argument("--token", help="client token for an already running TCP service")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    external = args.socket is not None or args.token is not None
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None if external else start_service(args, workdir)
+        try:
+            latencies, elapsed, errors = asyncio.run(run_load(args))
+            stats = asyncio.run(query_stats(args))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    results = report(args, latencies, elapsed, errors, stats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Benchmarks for the generation, vault and rendering hot paths.
+
+Runs headless: everything except the optional Tk resize benchmark works on
+the logic modules directly. Results are written as JSON so two runs can be
+compared:
+
+    python benchmarks/run_benchmarks.py -o before.json
+    ... change something ...
+    python benchmarks/run_benchmarks.py -o after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import generator  # noqa: E402
+import vault  # noqa: E402
+import wordlist  # noqa: E402
+
+GENERATION_LENGTHS = (8, 16, 32, 64)
+GENERATION_ALPHABETS = {
+    "all": (True, True, True, True),
+    "alnum": (True, True, True, False),
+    "lower": (False, True, False, False),
+}
+VAULT_SIZES = (100, 1_000, 10_000, 100_000)
+RESIZE_SIZES = ((700, 450), (900, 500), (1280, 720), (1920, 1080))
+
+# Results whose value gets better as it grows; everything else is a latency
+HIGHER_IS_BETTER = {"passwords/s", "passphrases/s"}
+
+
+def measure(func, repeat=5):
+    """Median wall time of func() in seconds over repeat runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def result(name, value, unit, **params):
+    """One machine-readable benchmark result."""
+    return {"name": name, "params": params, "value": value, "unit": unit}
+
+
+def bench_generation(args):
+    """Passwords per second for several lengths and alphabets."""
+    results = []
+    count = 20_000 if args.quick else 100_000
+    for alphabet, options in GENERATION_ALPHABETS.items():
+        charset = generator.get_charset(*options)
+        for length in GENERATION_LENGTHS:
+            seconds = measure(lambda: generator.generate_batch(charset, length, count), args.repeat)
+            results.append(result("generate_batch", count / seconds, "passwords/s",
+                                  alphabet=alphabet, length=length))
+
+    singles = 2_000
+    seconds = measure(lambda: [generator.generate_password(16) for _ in range(singles)], args.repeat)
+    results.append(result("generate_password", singles / seconds, "passwords/s", length=16))
+    results.extend(bench_passphrases(args, count))
+    return results
+
+
+def bench_passphrases(args, count):
+    """Passphrases per second from a synthetic 7776-word (diceware-sized) list."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "words.txt")
+        with open(path, "w") as f:
+            f.write("\n".join(f"word{i:04d}" for i in range(7776)))
+        words = wordlist.Wordlist(path)
+        seconds = measure(lambda: wordlist.generate_passphrases(words, count, 6), args.repeat)
+        words.close()
+        return [result("generate_passphrases", count / seconds, "passphrases/s", words=6)]
+
+
+def _record(i):
+    """Vault entry shaped like the ones the GUI saves."""
+    return {"label": f"account-{i}", "password": f"{i:020d}", "date": "2024-01-01 00:00:00", "length": 20}
+
+
+def bench_vault(args):
+    """Vault latencies for a range of vault sizes."""
+    results = []
+    sizes = [size for size in VAULT_SIZES if not args.quick or size <= 10_000]
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            key = vault.get_or_create_key(os.path.join(tmp, "bench.key"))
+            v = vault.Vault(key,
+                            records_file=os.path.join(tmp, "bench.records"),
+                            index_file=os.path.join(tmp, "bench.index"),
+                            journal_file=os.path.join(tmp, "bench.journal"))
+            v.append_many([_record(i) for i in range(size)])
+            v.compact()
+
+            results.append(result("vault_load", measure(v.load, args.repeat) * 1000, "ms", entries=size))
+
+            session = vault.VaultSession(v, idle_timeout=0)
+            session.records()
+            results.append(result("vault_session_reload", measure(session.records, args.repeat) * 1000,
+                                  "ms", entries=size))
+
+            counter = iter(range(size, size + 10_000))
+            results.append(result("vault_save", measure(lambda: v.append(_record(next(counter))),
+                                                        args.repeat * 4) * 1000, "ms", entries=size))
+            results.append(result("vault_find", measure(lambda: v.find(f"account-{size // 2}"),
+                                                        args.repeat) * 1000, "ms", entries=size))
+            results.append(result("vault_audit", measure(v.reused, args.repeat) * 1000, "ms", entries=size))
+            results.append(result("vault_compact", measure(v.compact, 1) * 1000, "ms", entries=size))
+    return results
+
+
+def bench_resize(args):
+    """Background rendering cost per window size and quality."""
+    try:
+        import rendering
+    except ImportError as e:
+        print(f"Skipping resize benchmarks: {e}", file=sys.stderr)
+        return []
+
+    results = []
+    image = rendering.load_image(os.path.join(APP_DIR, "background.png"))
+    renderer = rendering.BackgroundRenderer(None, None, image)
+    for width, height in RESIZE_SIZES:
+        for fast in (True, False):
+            seconds = measure(lambda: renderer.render((width, height), fast=fast), args.repeat)
+            results.append(result("background_render", seconds * 1000, "ms",
+                                  size=f"{width}x{height}", mode="fast" if fast else "quality"))
+    results.extend(bench_resize_events(args, image))
+    return results
+
+
+def bench_resize_events(args, image):
+    """Time a simulated drag-resize through Tk, when a display is available."""
+    import tkinter as tk
+    import rendering
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping Tk resize benchmark: {e}", file=sys.stderr)
+        return []
+    try:
+        root.geometry("900x500")
+        label = tk.Label(root)
+        label.place(x=0, y=0, relwidth=1, relheight=1)
+        renderer = rendering.BackgroundRenderer(root, label, image)
+        root.bind("<Configure>", renderer.on_configure)
+        root.update()
+
+        steps = 120
+
+        def drag():
+            for step in range(steps):
+                root.geometry(f"{900 + step * 4}x{500 + step * 2}")
+                root.update()
+            # Let the settle pass run
+            root.after(rendering.SETTLE_DELAY_MS + 50, root.quit)
+            root.mainloop()
+
+        seconds = measure(drag, 1)
+        return [result("resize_drag", seconds * 1000, "ms", steps=steps)]
+    finally:
+        root.destroy()
+
+
+SUITES = {
+    "generation": bench_generation,
+    "vault": bench_vault,
+    "resize": bench_resize,
+}
+
+
+def compare(results, baseline_path):
+    """Print the change of every result against a previous run."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["name"], json.dumps(r["params"], sort_keys=True)): r for r in baseline["results"]}
+    print(f"{'benchmark':<55} {'before':>12} {'after':>12} {'change':>8}")
+    for r in results:
+        key = (r["name"], json.dumps(r["params"], sort_keys=True))
+        old = previous.get(key)
+        label = r["name"] + " " + " ".join(f"{k}={v}" for k, v in sorted(r["params"].items()))
+        if old is None or not old["value"]:
+            print(f"{label:<55} {'-':>12} {r['value']:>12.4g} {'new':>8}")
+            continue
+        change = (r["value"] - old["value"]) / old["value"] * 100
+        if r["unit"] not in HIGHER_IS_BETTER:
+            change = -change
+        # Positive always means faster
+        print(f"{label:<55} {old['value']:>12.4g} {r['value']:>12.4g} {change:>+7.1f}%")
+
+
+def main(argv=None):
+    """Run the selected suites and write or compare the results."""
+    parser = argparse.ArgumentParser(description="Password Generator benchmarks")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous JSON result")
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append",
+                        help="run only this suite (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (default: 5)")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.suite or SUITES:
+        print(f"Running {name} benchmarks...", file=sys.stderr)
+        results.extend(SUITES[name](args))
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
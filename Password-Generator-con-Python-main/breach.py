@@ -0,0 +1,148 @@
+"""Offline breached-password lookups against a local Pwned Passwords dump.
+
+Works with the SHA-1 "ordered by hash" download from haveibeenpwned.com,
+one "HASH:COUNT" line per password sorted by hash. The file is memory-mapped
+and binary-searched, so a lookup touches a few dozen pages (microseconds once
+they are cached) and the multi-GB file is never read into RAM.
+
+build_compact() converts the text dump to a fixed-width binary file (20-byte
+digest + 4-byte count per entry, ~40% of the text size) that is searched the
+same way without having to find line boundaries. BreachDatabase accepts
+either format.
+"""
+import hashlib
+import mmap
+import os
+import struct
+
+import metrics
+
+BREACH_FILE = "pwned-passwords-sha1.txt"
+BREACH_ENV = "PASSWORD_GENERATOR_BREACH_DB"
+
+COMPACT_MAGIC = b"PGBRCH1\0"
+COMPACT_ENTRY = struct.Struct(">20sI")
+
+HASH_HEX_SIZE = 40
+
+# Entries converted between progress reports in build_compact
+PROGRESS_INTERVAL = 1_000_000
+
+
+def sha1_digest(password):
+    """SHA-1 of a password as stored in the dump."""
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+class BreachDatabase:
+    """Read-only, memory-mapped view of a sorted breach hash file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                raise ValueError(f"{path} is empty")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.compact = self._data[:len(COMPACT_MAGIC)] == COMPACT_MAGIC
+        if self.compact:
+            self._entries = (len(self._data) - len(COMPACT_MAGIC)) // COMPACT_ENTRY.size
+        elif self._data.find(b":", 0, HASH_HEX_SIZE + 1) != HASH_HEX_SIZE:
+            self._data.close()
+            raise ValueError(f"{path} is not a SHA-1 ordered Pwned Passwords file")
+
+    def close(self):
+        self._data.close()
+
+    def _count_compact(self, digest):
+        data = self._data
+        lo, hi = 0, self._entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = len(COMPACT_MAGIC) + mid * COMPACT_ENTRY.size
+            key = data[offset:offset + 20]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return COMPACT_ENTRY.unpack_from(data, offset)[1]
+        return 0
+
+    def _count_text(self, digest):
+        data = self._data
+        target = digest.hex().upper().encode("ascii")
+        # Invariant: lo is always the start of a line
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            newline = data.rfind(b"\n", lo, mid)
+            start = lo if newline == -1 else newline + 1
+            key = data[start:start + HASH_HEX_SIZE].upper()
+            if key == target:
+                end = data.find(b"\n", start)
+                return int(data[start + HASH_HEX_SIZE + 1:end if end != -1 else len(data)] or 0)
+            if key < target:
+                end = data.find(b"\n", start)
+                if end == -1:
+                    break
+                lo = end + 1
+            else:
+                hi = start
+        return 0
+
+    def count(self, password):
+        """Return how many times password appears in the breach corpus (0 if never)."""
+        digest = sha1_digest(password)
+        with metrics.timed("breach.lookup"):
+            if self.compact:
+                return self._count_compact(digest)
+            return self._count_text(digest)
+
+    def __contains__(self, password):
+        return self.count(password) > 0
+
+
+_default = None
+
+
+def open_default(path=None):
+    """Return the shared database for path (or $PASSWORD_GENERATOR_BREACH_DB / BREACH_FILE).
+
+    Returns None when no breach file is installed, so callers can skip the check.
+    """
+    global _default
+    path = path or os.environ.get(BREACH_ENV) or BREACH_FILE
+    if _default is not None and _default.path == path:
+        return _default
+    if not os.path.exists(path):
+        return None
+    _default = BreachDatabase(path)
+    return _default
+
+
+def build_compact(src, dst, progress=None):
+    """Convert a sorted "HASH:COUNT" text dump to the compact binary format.
+
+    Streams line by line, so memory use doesn't depend on the dump size.
+    progress(entries) is called every PROGRESS_INTERVAL entries.
+    """
+    written = 0
+    previous = b""
+    tmp = dst + ".tmp"
+    with open(src, "rb") as text, open(tmp, "wb", buffering=1024 * 1024) as out:
+        out.write(COMPACT_MAGIC)
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            digest = bytes.fromhex(line[:HASH_HEX_SIZE].decode("ascii"))
+            if digest <= previous:
+                raise ValueError(f"{src} is not sorted by hash (line {written + 1})")
+            count = int(line[HASH_HEX_SIZE + 1:] or 0)
+            out.write(COMPACT_ENTRY.pack(digest, min(count, 0xFFFFFFFF)))
+            previous = digest
+            written += 1
+            if progress is not None and written % PROGRESS_INTERVAL == 0:
+                progress(written)
+    os.replace(tmp, dst)
+    return written
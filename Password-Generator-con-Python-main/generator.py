@@ -0,0 +1,252 @@
+"""Headless password generation engine shared by the GUI and the bulk tools."""
+import re
+import os
+import secrets
+import string
+from collections import deque
+from functools import lru_cache
+from math import exp, lgamma, log
+
+import metrics
+
+# Same minimum the GUI enforces
+MIN_LENGTH = 4
+
+# Character classes, in the same order as the checkboxes in the GUI
+UPPERCASE = string.ascii_uppercase
+LOWERCASE = string.ascii_lowercase
+DIGITS = string.digits
+SYMBOLS = string.punctuation
+
+# Passwords produced per CSPRNG draw when streaming
+BATCH_SIZE = 4096
+
+# Upper bound on random bytes fetched in one go, for policies that reject most candidates
+MAX_DRAW = 1024 * 1024
+
+# Random bytes drawn without a single acceptable password before a policy is
+# declared unsatisfiable at that length: 32 times the expected cost of one
+# password, but at least MIN_FRUITLESS_BYTES and at most MAX_FRUITLESS_BYTES
+MIN_FRUITLESS_BYTES = 16 * MAX_DRAW
+MAX_FRUITLESS_BYTES = 256 * MAX_DRAW
+
+# Passwords generated per task when fanning out across processes
+PARALLEL_CHUNK_SIZE = 50_000
+
+
+class CompiledCharset:
+    """Alphabet and lookup tables built once for a set of character classes.
+
+    minimums gives, per class, how many characters of that class a password
+    must contain (default one each; zero makes the class optional), and
+    no_repeat rejects passwords with the same character twice in a row.
+    """
+
+    def __init__(self, classes, minimums=None, no_repeat=False):
+        self.classes = tuple(classes)
+        self.minimums = tuple(minimums) if minimums is not None else (1,) * len(self.classes)
+        self.no_repeat = no_repeat
+        self.alphabet = "".join(self.classes)
+        size = len(self.alphabet)
+        if not size:
+            raise ValueError("Please select at least one character type")
+        if size > 256 or len(set(self.alphabet)) != size or not all(self.classes):
+            raise ValueError("Character classes must be disjoint, non-empty and fit in one byte")
+        if any(ord(c) > 255 for c in self.alphabet):
+            raise ValueError("Character classes may only use Latin-1 characters")
+        if len(self.minimums) != len(self.classes) or min(self.minimums) < 0:
+            raise ValueError("Need one non-negative minimum per character class")
+
+        # Bytes at or above the largest multiple of the alphabet size are thrown
+        # away so that every character is equally likely (no modulo bias).
+        self.limit = 256 - 256 % size
+        self.table = bytes(ord(self.alphabet[b % size]) if b < self.limit else 0
+                           for b in range(256))
+        self.rejected = bytes(range(self.limit, 256))
+
+        # One lookahead per class: a candidate is valid when it contains at
+        # least the minimum number of characters from every class, and (with
+        # no_repeat) no character directly followed by itself.
+        lookaheads = ["(?!.*(.)\\1)"] if no_repeat else []
+        for chars, minimum in zip(self.classes, self.minimums):
+            if minimum == 1:
+                lookaheads.append(f"(?=.*[{re.escape(chars)}])")
+            elif minimum > 1:
+                lookaheads.append(f"(?=(?:.*?[{re.escape(chars)}]){{{minimum}}})")
+        self.pattern = re.compile("".join(lookaheads), re.DOTALL)
+
+    @property
+    def required(self):
+        """Smallest length that can satisfy every minimum."""
+        return sum(self.minimums)
+
+    def is_valid(self, candidate):
+        """Check that a candidate satisfies every class minimum and the repeat rule."""
+        return self.pattern.match(candidate) is not None
+
+
+@lru_cache(maxsize=None)
+def compile_charset(classes, minimums=None, no_repeat=False):
+    """Return the compiled charset for arbitrary classes, building it only once."""
+    return CompiledCharset(classes, minimums, no_repeat)
+
+
+@lru_cache(maxsize=None)
+def get_charset(uppercase=True, lowercase=True, digits=True, symbols=True):
+    """Return the compiled charset for a combination of the four GUI options."""
+    classes = []
+    if uppercase:
+        classes.append(UPPERCASE)
+    if lowercase:
+        classes.append(LOWERCASE)
+    if digits:
+        classes.append(DIGITS)
+    if symbols:
+        classes.append(SYMBOLS)
+    return compile_charset(tuple(classes))
+
+
+@lru_cache(maxsize=256)
+def valid_fraction(charset, length):
+    """Share of uniform candidates that pass charset.pattern.
+
+    Exact for the class minimums, by inclusion-exclusion over the classes
+    that fall short: the chance that every class in a subset gets fewer
+    than its minimum only needs the few small counts below the minimums,
+    so the cost doesn't grow with length. The no-repeat rule is folded in
+    as an independent factor.
+    """
+    size = len(charset.alphabet)
+    shares = [len(c) / size for c in charset.classes]
+    constrained = [i for i, minimum in enumerate(charset.minimums) if minimum]
+    total = 0.0
+    for mask in range(1 << len(constrained)):
+        subset = [constrained[i] for i in range(len(constrained)) if mask >> i & 1]
+        # poly[k]: sum over ways to give the subset k characters in total,
+        # each class below its minimum, of prod(share ** count / count!)
+        poly = [1.0]
+        for i in subset:
+            terms = [shares[i] ** count / exp(lgamma(count + 1)) for count in range(charset.minimums[i])]
+            combined = [0.0] * (len(poly) + len(terms) - 1)
+            for a, x in enumerate(poly):
+                for b, y in enumerate(terms):
+                    combined[a + b] += x * y
+            poly = combined
+        rest = 1.0 - sum(shares[i] for i in subset)
+        shortfall = 0.0
+        for k, coefficient in enumerate(poly[:length + 1]):
+            if coefficient == 0.0:
+                continue
+            if k < length:
+                if rest <= 0.0:
+                    continue
+                # length! / (length - k)! * rest ** (length - k), in log space
+                weight = exp(lgamma(length + 1) - lgamma(length - k + 1) + (length - k) * log(rest))
+            else:
+                weight = exp(lgamma(length + 1))
+            shortfall += coefficient * weight
+        total += -shortfall if len(subset) % 2 else shortfall
+    total = min(1.0, max(0.0, total))
+    if charset.no_repeat:
+        total *= ((size - 1) / size) ** (length - 1)
+    return total
+
+
+def _check_length(charset, length):
+    if length < MIN_LENGTH:
+        raise ValueError(f"Password length must be at least {MIN_LENGTH}")
+    if length < charset.required:
+        raise ValueError("Password length is shorter than the number of character types")
+    if charset.no_repeat and len(charset.alphabet) < 2:
+        raise ValueError("A single-character alphabet cannot avoid repeats")
+    if charset.no_repeat:
+        for chars, minimum in zip(charset.classes, charset.minimums):
+            # Copies of a one-character class need something between them
+            if len(chars) == 1 and minimum > (length + 1) // 2:
+                raise ValueError(f"{chars!r} can't appear {minimum} times without repeats "
+                                 f"in {length} characters")
+
+
+def generate_batch(charset, length, count):
+    """Generate count passwords from one large CSPRNG block using bulk byte operations."""
+    _check_length(charset, length)
+    with metrics.timed("generate.batch"):
+        passwords = _generate_batch(charset, length, count)
+    metrics.increment("generate.passwords", count)
+    return passwords
+
+
+def _generate_batch(charset, length, count):
+    passwords = []
+    # Expected raw bytes per accepted password, padded so one draw is usually enough
+    fraction = max(valid_fraction(charset, length), 1e-9)
+    bytes_per_password = length * 256 / charset.limit / fraction * 1.05
+    # Characters left over from the previous draw, so passwords longer than
+    # one draw still get built
+    carry = ""
+    fruitless = 0
+    give_up = min(MAX_FRUITLESS_BYTES, max(MIN_FRUITLESS_BYTES, int(bytes_per_password * 32)))
+    while len(passwords) < count:
+        missing = count - len(passwords)
+        size = min(MAX_DRAW, int(missing * bytes_per_password) + length * 4)
+        raw = secrets.token_bytes(size)
+        chars = carry + raw.translate(charset.table, charset.rejected).decode("latin-1")
+        usable = len(chars) - len(chars) % length
+        carry = chars[usable:]
+        candidates = [chars[start:start + length] for start in range(0, usable, length)]
+        accepted = len(passwords)
+        passwords.extend(filter(charset.pattern.match, candidates))
+        if len(passwords) > accepted:
+            fruitless = 0
+        else:
+            fruitless += size
+            if fruitless > give_up:
+                raise ValueError(f"No password of length {length} found that meets every rule; "
+                                 "the policy is too strict for this length")
+    del passwords[count:]
+    return passwords
+
+
+def iter_passwords(charset, length, count=None):
+    """Yield passwords built from a compiled charset, forever if count is None."""
+    _check_length(charset, length)
+    produced = 0
+    while count is None or produced < count:
+        wanted = BATCH_SIZE if count is None else min(BATCH_SIZE, count - produced)
+        yield from generate_batch(charset, length, wanted)
+        produced += wanted
+
+
+def generate_parallel(charset, length, count, workers=None, chunk_size=PARALLEL_CHUNK_SIZE):
+    """Yield lists of passwords generated across a process pool, in request order.
+
+    Every worker draws straight from os.urandom, so no random state is shared
+    between processes. Only a couple of chunks per worker are in flight at
+    once, which keeps memory bounded when the consumer is slower than the pool.
+    """
+    # Pulls in multiprocessing, which nothing else here needs
+    from concurrent.futures import ProcessPoolExecutor
+
+    _check_length(charset, length)
+    workers = workers or os.cpu_count() or 1
+    sizes = (min(chunk_size, count - start) for start in range(0, count, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for size in sizes:
+            pending.append(pool.submit(generate_batch, charset, length, size))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate_password(length=16, uppercase=True, lowercase=True, digits=True, symbols=True):
+    """Generate a single password with at least one character of each selected type."""
+    charset = get_charset(uppercase, lowercase, digits, symbols)
+    return next(iter_passwords(charset, length, 1))
+
+
+def generate_passwords(count, length=16, uppercase=True, lowercase=True, digits=True, symbols=True):
+    """Generate a list of passwords, compiling the character tables only once."""
+    charset = get_charset(uppercase, lowercase, digits, symbols)
+    return generate_batch(charset, length, count)
@@ -0,0 +1,85 @@
+"""Bounded session history of generated passwords."""
+import os
+from collections import deque
+from datetime import datetime
+
+# Entries kept unless PASSWORD_GENERATOR_HISTORY_SIZE says otherwise
+DEFAULT_CAPACITY = 10
+CAPACITY_ENV = "PASSWORD_GENERATOR_HISTORY_SIZE"
+MAX_CAPACITY = 100_000
+
+
+def default_capacity():
+    """Capacity from the environment, falling back to DEFAULT_CAPACITY."""
+    try:
+        return max(1, min(MAX_CAPACITY, int(os.environ.get(CAPACITY_ENV, DEFAULT_CAPACITY))))
+    except ValueError:
+        return DEFAULT_CAPACITY
+
+
+class HistoryEntry:
+    """One generated password; the characters live in a bytearray so they can be wiped."""
+
+    __slots__ = ("secret", "time", "length")
+
+    def __init__(self, password, time):
+        self.secret = bytearray(password.encode("utf-8"))
+        self.time = time
+        self.length = len(password)
+
+    @property
+    def password(self):
+        return self.secret.decode("utf-8")
+
+    def wipe(self):
+        """Overwrite the stored password with zero bytes."""
+        self.secret[:] = bytes(len(self.secret))
+        self.length = 0
+
+
+class PasswordHistory:
+    """Fixed-capacity ring buffer: adding is O(1) and the oldest entry is wiped on eviction.
+
+    Only the copy held here is wiped; strings already handed to Tk or the
+    clipboard are immutable and outside our control.
+    """
+
+    def __init__(self, capacity=None):
+        self._entries = deque(maxlen=capacity or default_capacity())
+
+    @property
+    def capacity(self):
+        return self._entries.maxlen
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        """Oldest first."""
+        return iter(self._entries)
+
+    def newest_first(self):
+        return reversed(self._entries)
+
+    def add(self, password, time=None):
+        """Record a password; returns (new entry, evicted entry or None)."""
+        entry = HistoryEntry(password, time or datetime.now().strftime("%H:%M:%S"))
+        evicted = None
+        if len(self._entries) == self._entries.maxlen:
+            evicted = self._entries.popleft()
+            evicted.wipe()
+        self._entries.append(entry)
+        return entry, evicted
+
+    def resize(self, capacity):
+        """Change the capacity, wiping the oldest entries if it shrinks."""
+        capacity = max(1, min(MAX_CAPACITY, int(capacity)))
+        while len(self._entries) > capacity:
+            self._entries.popleft().wipe()
+        self._entries = deque(self._entries, maxlen=capacity)
+
+    def clear(self):
+        """Wipe and drop every entry."""
+        for entry in self._entries:
+            entry.wipe()
+        self._entries.clear()
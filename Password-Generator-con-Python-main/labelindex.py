@@ -0,0 +1,71 @@
+"""Substring search over vault labels."""
+from array import array
+from bisect import bisect_right
+
+# Never part of a label typed into the save dialog (an Entry is single-line)
+SEPARATOR = "\n"
+
+# Above one hit per this many labels a query counts as dense
+DENSE_RATIO = 16
+
+
+class LabelIndex:
+    """Case-insensitive label search that narrows results as the query grows.
+
+    All labels are folded into one string, separated by newlines, plus an
+    array with the offset where each label starts. Lookups run str.find over
+    that string, which scans in C instead of testing labels one by one in
+    Python, and bisect the offset array to turn a hit into a record position.
+    A query that extends the previous one only re-checks the previous hits,
+    so typing into the search box stays cheap on big vaults. Results are
+    record positions, newest (highest) first.
+    """
+
+    def __init__(self, labels):
+        self._keys = [label.casefold() for label in labels]
+        self._starts = array("Q")
+        offset = 1
+        for key in self._keys:
+            self._starts.append(offset)
+            offset += len(key) + 1
+        self._corpus = SEPARATOR + SEPARATOR.join(self._keys) + SEPARATOR
+        self._last_query = None
+        self._last_result = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _scan(self, needle):
+        """Return positions of labels containing needle, newest first."""
+        corpus = self._corpus
+        starts = self._starts
+        if corpus.count(needle) * DENSE_RATIO > len(starts):
+            # Many labels match; testing each label directly is cheaper than
+            # locating every hit in the offset array
+            keys = self._keys
+            return [i for i in range(len(keys) - 1, -1, -1) if needle in keys[i]]
+        matches = []
+        hit = corpus.find(needle)
+        while hit != -1:
+            position = bisect_right(starts, hit) - 1
+            matches.append(position)
+            if position + 1 == len(starts):
+                break
+            hit = corpus.find(needle, starts[position + 1])
+        matches.reverse()
+        return matches
+
+    def search(self, text):
+        """Return positions of labels containing text."""
+        text = text.casefold()
+        if not text:
+            return range(len(self._keys) - 1, -1, -1)
+        if self._last_query and self._last_query in text:
+            # The new query is a refinement; only previous hits can still match
+            keys = self._keys
+            result = [position for position in self._last_result if text in keys[position]]
+        else:
+            result = self._scan(text)
+        self._last_query = text
+        self._last_result = result
+        return result
@@ -0,0 +1,187 @@
+"""Master-password protection for the vault key.
+
+Without a master password the Fernet key sits in password_vault.key in the
+clear. Setting one wraps that key (encrypts it with Fernet) under a key
+derived from the password with scrypt, stores the result and the scrypt
+parameters in password_vault.kdf and deletes the plain key file. The vault
+contents are not re-encrypted, so changing the master password only
+rewraps the key.
+
+scrypt's cost is calibrated on the machine setting the password so that an
+unlock takes about TARGET_UNLOCK_MS; the parameters travel with the file,
+so a slower machine simply takes longer to unlock. The memory scrypt needs
+grows with the same cost, so it is also capped at MAX_MEMORY: a vault
+protected on a fast machine must still unlock on a small one.
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import secrets
+import time
+
+import metrics
+
+KDF_FILE = "password_vault.kdf"
+
+# Unlock latency the calibration aims for
+TARGET_UNLOCK_MS = 250
+
+# scrypt parameters: n (CPU/memory cost) is calibrated, r and p are fixed
+BLOCK_SIZE = 8
+PARALLELISM = 1
+SALT_SIZE = 16
+
+# Most memory (128 * r * n bytes) a derivation may need, whatever the target time
+MAX_MEMORY = 256 * 1024 * 1024
+
+MIN_COST = 2 ** 14
+MAX_COST = MAX_MEMORY // (128 * BLOCK_SIZE)
+
+
+class MasterPasswordError(ValueError):
+    """Raised when a master password doesn't unlock the vault key."""
+
+
+class VaultLocked(Exception):
+    """Raised when the vault key is protected and no master password was given."""
+
+
+def _maxmem(n, r, p):
+    # scrypt needs 128 * r * (n + p) bytes; leave some headroom
+    return 128 * r * (n + p + 2) + 1024 * 1024
+
+
+def _max_cost(r):
+    # Largest power of two whose memory use stays within MAX_MEMORY
+    return 1 << (MAX_MEMORY // (128 * r)).bit_length() - 1
+
+
+def derive_key(password, salt, n, r=BLOCK_SIZE, p=PARALLELISM):
+    """Derive a Fernet key (urlsafe base64 of 32 bytes) from a password."""
+    raw = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                         maxmem=_maxmem(n, r, p), dklen=32)
+    return base64.urlsafe_b64encode(raw)
+
+
+def calibrate(target_ms=TARGET_UNLOCK_MS, r=BLOCK_SIZE, p=PARALLELISM):
+    """Return scrypt parameters that take about target_ms to derive on this machine.
+
+    scrypt's cost is linear in n, so one timing at MIN_COST predicts the
+    power of two to use; a second timing at that n corrects the guess once.
+    n never goes past the MAX_MEMORY cap, so a large target_ms may give a
+    faster unlock than asked for.
+    """
+    max_cost = _max_cost(r)
+    salt = secrets.token_bytes(SALT_SIZE)
+
+    def timed(n):
+        start = time.perf_counter()
+        derive_key("calibration", salt, n, r, p)
+        return (time.perf_counter() - start) * 1000
+
+    n = MIN_COST
+    elapsed = timed(n)
+    steps = max(0, math.floor(math.log2(target_ms / max(elapsed, 1e-3))))
+    n = min(max_cost, MIN_COST << steps)
+    if n != MIN_COST:
+        elapsed = timed(n)
+        if elapsed < target_ms / 2 and n < max_cost:
+            n *= 2
+            elapsed *= 2
+        elif elapsed > target_ms * 2 and n > MIN_COST:
+            n //= 2
+            elapsed /= 2
+    return {"kdf": "scrypt", "n": n, "r": r, "p": p, "ms": round(elapsed)}
+
+
+def kdf_file_for(key_file):
+    """The KDF file that protects key_file: same name with a .kdf extension."""
+    return os.path.splitext(key_file)[0] + ".kdf"
+
+
+def is_protected(kdf_file=KDF_FILE):
+    return os.path.exists(kdf_file)
+
+
+def load_params(kdf_file=KDF_FILE):
+    with open(kdf_file, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("kdf") != "scrypt":
+        raise ValueError(f"Unsupported key derivation {data.get('kdf')!r} in {kdf_file}")
+    return data
+
+
+def unlock(password, kdf_file=KDF_FILE):
+    """Return the vault key wrapped in kdf_file, or raise MasterPasswordError."""
+    from cryptography.fernet import Fernet, InvalidToken
+
+    params = load_params(kdf_file)
+    with metrics.timed("vault.unlock"):
+        wrapping_key = derive_key(password, base64.b64decode(params["salt"]),
+                                  params["n"], params["r"], params["p"])
+    try:
+        return Fernet(wrapping_key).decrypt(params["wrapped_key"].encode("ascii"))
+    except InvalidToken:
+        raise MasterPasswordError("Wrong master password") from None
+
+
+def protect(key, password, kdf_file=KDF_FILE, params=None):
+    """Wrap key under password and write kdf_file atomically (owner-only permissions)."""
+    from cryptography.fernet import Fernet
+
+    if not password:
+        raise ValueError("The master password can't be empty")
+    params = dict(params or calibrate())
+    if params["n"] > _max_cost(params["r"]):
+        raise ValueError(f"scrypt n={params['n']} would need more than {MAX_MEMORY // 2 ** 20} MiB to unlock")
+    salt = secrets.token_bytes(SALT_SIZE)
+    wrapping_key = derive_key(password, salt, params["n"], params["r"], params["p"])
+    params.update(salt=base64.b64encode(salt).decode("ascii"),
+                  wrapped_key=Fernet(wrapping_key).encrypt(key).decode("ascii"))
+    tmp = kdf_file + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, kdf_file)
+    return params
+
+
+def _wipe_file(path):
+    """Overwrite a small file with zeros before deleting it (best effort on SSDs/journaling filesystems)."""
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.write(bytes(size))
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(path)
+
+
+def set_master_password(password, key_file, kdf_file=KDF_FILE, target_ms=TARGET_UNLOCK_MS):
+    """Protect the key in key_file (created if missing) with a master password.
+
+    Returns the vault key. The plain key file is wiped once the wrapped key
+    is safely on disk.
+    """
+    if is_protected(kdf_file):
+        raise ValueError("The vault already has a master password")
+    if os.path.exists(key_file):
+        with open(key_file, "rb") as f:
+            key = f.read().strip()
+    else:
+        from cryptography.fernet import Fernet
+        key = Fernet.generate_key()
+    protect(key, password, kdf_file, calibrate(target_ms))
+    if os.path.exists(key_file):
+        _wipe_file(key_file)
+    return key
+
+
+def change_master_password(old_password, new_password, kdf_file=KDF_FILE, target_ms=TARGET_UNLOCK_MS):
+    """Rewrap the vault key under a new master password; returns the key."""
+    key = unlock(old_password, kdf_file)
+    protect(key, new_password, kdf_file, calibrate(target_ms))
+    return key
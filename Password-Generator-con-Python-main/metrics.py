@@ -0,0 +1,148 @@
+"""Lightweight counters and latency histograms for the app's hot paths.
+
+Disabled by default; set PASSWORD_GENERATOR_METRICS=1 or call enable(). While
+disabled, timed() hands back a shared do-nothing context manager and
+increment()/record() return after a single flag check, so instrumented code
+pays next to nothing.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+enabled = bool(os.environ.get("PASSWORD_GENERATOR_METRICS"))
+
+# Histogram buckets are powers of two, in microseconds: bucket b holds
+# samples in [2**(b-1), 2**b) us, bucket 0 anything under 1 us
+MAX_BUCKET = 40
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+class Histogram:
+    """Log2-bucketed latency histogram."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = [0] * (MAX_BUCKET + 1)
+
+    def add(self, seconds):
+        micros = seconds * 1e6
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = 0 if micros < 1 else min(MAX_BUCKET, int(micros).bit_length())
+        self.buckets[bucket] += 1
+
+    def percentile(self, fraction):
+        """Approximate percentile in seconds (upper edge of the matching bucket)."""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= wanted:
+                return min(self.max, (2 ** bucket) / 1e6)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets_us": {f"<{2 ** b}": hits for b, hits in enumerate(self.buckets) if hits},
+        }
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def enable(flag=True):
+    """Turn collection on or off at runtime."""
+    global enabled
+    enabled = flag
+
+
+def increment(name, amount=1):
+    """Add amount to a counter."""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def record(name, seconds):
+    """Add one latency sample to a histogram."""
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+def timed(name):
+    """Context manager that records how long its block takes."""
+    return _Timer(name) if enabled else _NO_TIMER
+
+
+def snapshot():
+    """Return all counters and histograms as plain data."""
+    with _lock:
+        return {
+            "enabled": enabled,
+            "counters": dict(sorted(_counters.items())),
+            "timings": {name: h.as_dict() for name, h in sorted(_histograms.items())},
+        }
+
+
+def export_json(path):
+    """Write the current snapshot to a JSON file."""
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def reset():
+    """Forget everything collected so far."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
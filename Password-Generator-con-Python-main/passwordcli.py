@@ -0,0 +1,325 @@
+"""Command-line interface for bulk password and passphrase generation."""
+import argparse
+import csv
+import getpass
+import json
+import multiprocessing
+import os
+import sys
+
+import breach
+import generator
+import masterkey
+import policies
+import vault
+import vaultio
+import wordlist
+
+# Buffer size used when writing to files
+WRITE_BUFFER = 1024 * 1024
+
+FORMATS = ("plain", "csv", "jsonl")
+
+
+def iter_chunks(charset, length, count, workers=1):
+    """Yield lists of passwords without ever holding more than a few chunks."""
+    if workers > 1:
+        yield from generator.generate_parallel(charset, length, count, workers=workers)
+        return
+    for start in range(0, count, generator.BATCH_SIZE):
+        yield generator.generate_batch(charset, length, min(generator.BATCH_SIZE, count - start))
+
+
+def write_passwords(chunks, out, fmt="plain"):
+    """Stream chunks of passwords to a text file object in the given format."""
+    written = 0
+    if fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["index", "password"])
+        for chunk in chunks:
+            writer.writerows(enumerate(chunk, written + 1))
+            written += len(chunk)
+    elif fmt == "jsonl":
+        for chunk in chunks:
+            out.write("".join(json.dumps({"index": index, "password": password}) + "\n"
+                              for index, password in enumerate(chunk, written + 1)))
+            written += len(chunk)
+    else:
+        for chunk in chunks:
+            out.write("\n".join(chunk))
+            out.write("\n")
+            written += len(chunk)
+    return written
+
+
+def iter_passphrase_chunks(words, count, word_count, separator):
+    """Yield lists of passphrases, one bulk random draw per chunk."""
+    for start in range(0, count, generator.BATCH_SIZE):
+        yield wordlist.generate_passphrases(words, min(generator.BATCH_SIZE, count - start),
+                                            word_count, separator)
+
+
+def write_output(chunks, args, noun="passwords"):
+    """Write chunks to args.output ('-' for stdout) in args.format."""
+    if args.output == "-":
+        written = write_passwords(chunks, sys.stdout, args.format)
+        sys.stdout.flush()
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as out:
+            written = write_passwords(chunks, out, args.format)
+        print(f"Wrote {written} {noun} to {args.output}", file=sys.stderr)
+    return 0
+
+
+def get_policy(args):
+    """Return the policy named by --policy, or None."""
+    if args.policy is None:
+        return None
+    available = policies.load_policies(args.policies)
+    if args.policy not in available:
+        raise ValueError(f"Unknown policy {args.policy!r} (available: {', '.join(sorted(available))})")
+    return available[args.policy]
+
+
+def cmd_generate(args):
+    """Handle the generate subcommand."""
+    policy = get_policy(args)
+    if policy is not None:
+        charset = policy.charset
+        length = args.length or policy.length
+    else:
+        charset = generator.get_charset(not args.no_uppercase, not args.no_lowercase,
+                                        not args.no_digits, not args.no_symbols)
+        length = args.length or policies.DEFAULT_LENGTH
+    return write_output(iter_chunks(charset, length, args.count, args.workers), args)
+
+
+def cmd_policies(args):
+    """Handle the policies subcommand: list the available policies."""
+    for name, policy in sorted(policies.load_policies(args.policies).items()):
+        charset = policy.charset
+        rules = ", ".join(f"{minimum}+ of {len(chars)}" for chars, minimum in
+                          zip(charset.classes, charset.minimums))
+        extra = " no-repeat" if policy.no_repeat else ""
+        print(f"{name:<16} length {policy.length:<4} {len(charset.alphabet):>3} chars ({rules}){extra}")
+    return 0
+
+
+def cmd_passphrase(args):
+    """Handle the passphrase subcommand."""
+    try:
+        words = wordlist.open_wordlist(args.wordlist)
+    except OSError as e:
+        raise ValueError(f"Cannot open wordlist: {e}") from e
+    chunks = iter_passphrase_chunks(words, args.count, args.words, args.separator)
+    return write_output(chunks, args, "passphrases")
+
+
+def open_existing_vault(key_file, create=False):
+    """Open the vault for key_file, asking for the master password if it has one.
+
+    Refuses to create a new key unless create is true.
+    """
+    kdf_file = masterkey.kdf_file_for(key_file)
+    if masterkey.is_protected(kdf_file):
+        key = masterkey.unlock(getpass.getpass("Master password: "), kdf_file)
+        return vault.open_vault(key_file, key)
+    if not create and not os.path.exists(key_file):
+        raise ValueError(f"No vault key at {key_file}")
+    return vault.open_vault(key_file)
+
+
+def cmd_audit(args):
+    """Handle the audit subcommand: report passwords saved under more than one entry."""
+    groups = open_existing_vault(args.key_file).reused()
+    for group in sorted(groups, key=len, reverse=True):
+        labels = [record["label"] for record in group]
+        kind = "duplicated" if len(set(labels)) == 1 else "reused"
+        print(f"Password {kind} by {len(group)} entries: {', '.join(labels)}")
+    reused = sum(len(group) for group in groups)
+    print(f"{reused} entries share a password with another entry ({len(groups)} distinct passwords)",
+          file=sys.stderr)
+    return 1 if groups else 0
+
+
+def cmd_breach(args):
+    """Handle the breach subcommand: check vault entries or stdin lines against a breach dump."""
+    if not os.path.exists(args.db):
+        raise ValueError(f"No breach database at {args.db}")
+    database = breach.BreachDatabase(args.db)
+    found = 0
+    if args.stdin:
+        for line in sys.stdin:
+            password = line.rstrip("\r\n")
+            seen = database.count(password)
+            if seen:
+                found += 1
+                print(f"{password}\t{seen}")
+    else:
+        for record in open_existing_vault(args.key_file).records():
+            seen = database.count(record["password"])
+            if seen:
+                found += 1
+                print(f"{record['label']}: found {seen:,} times in known breaches")
+    print(f"{found} breached passwords", file=sys.stderr)
+    return 1 if found else 0
+
+
+def cmd_breach_compact(args):
+    """Handle the breach-compact subcommand."""
+    written = breach.build_compact(args.source, args.output,
+                                   lambda done: print(f"{done:,} hashes...", file=sys.stderr))
+    print(f"Wrote {written:,} hashes to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_import(args):
+    """Handle the import subcommand."""
+    target = open_existing_vault(args.key_file, create=True)
+    imported = vaultio.import_records(target, args.source, args.format,
+                                      lambda done: print(f"{done:,} records...", file=sys.stderr),
+                                      workers=args.workers)
+    print(f"Imported {imported:,} records from {args.source}", file=sys.stderr)
+    return 0
+
+
+def cmd_export(args):
+    """Handle the export subcommand."""
+    exported = vaultio.export_records(open_existing_vault(args.key_file), args.output, args.format)
+    print(f"Exported {exported:,} records to {args.output} (unencrypted; keep it safe)", file=sys.stderr)
+    return 0
+
+
+def cmd_master_password(args):
+    """Handle the master-password subcommand: set or change the password protecting the vault key."""
+    if args.calibrate:
+        params = masterkey.calibrate(args.target_ms)
+        print(f"scrypt n={params['n']} r={params['r']} p={params['p']}: {params['ms']} ms")
+        return 0
+    kdf_file = masterkey.kdf_file_for(args.key_file)
+    current = None
+    if masterkey.is_protected(kdf_file):
+        current = getpass.getpass("Current master password: ")
+        masterkey.unlock(current, kdf_file)
+    new = getpass.getpass("New master password: ")
+    if new != getpass.getpass("Repeat new master password: "):
+        raise ValueError("The passwords don't match")
+    if current is None:
+        masterkey.set_master_password(new, args.key_file, kdf_file, args.target_ms)
+    else:
+        masterkey.change_master_password(current, new, kdf_file, args.target_ms)
+    params = masterkey.load_params(kdf_file)
+    removed = f"; {args.key_file} removed" if current is None else ""
+    print(f"Master password set (scrypt n={params['n']}, about {params['ms']} ms to unlock){removed}",
+          file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    """Build the argument parser for all subcommands."""
+    parser = argparse.ArgumentParser(prog="passwordcli", description="Password Generator command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="generate passwords in bulk")
+    gen.add_argument("-n", "--count", type=int, default=1, help="number of passwords (default: 1)")
+    gen.add_argument("-l", "--length", type=int,
+                     help=f"password length (default: the policy's, else {policies.DEFAULT_LENGTH})")
+    gen.add_argument("-p", "--policy", help="named policy to generate with (see the policies command)")
+    gen.add_argument("--no-uppercase", action="store_true", help="exclude uppercase letters")
+    gen.add_argument("--no-lowercase", action="store_true", help="exclude lowercase letters")
+    gen.add_argument("--no-digits", action="store_true", help="exclude digits")
+    gen.add_argument("--no-symbols", action="store_true", help="exclude symbols")
+    gen.add_argument("-f", "--format", choices=FORMATS, default="plain", help="output format (default: plain)")
+    gen.add_argument("-o", "--output", default="-", help="output file, '-' for stdout (default)")
+    gen.add_argument("-w", "--workers", type=int, default=1,
+                     help="worker processes, 0 for one per CPU (default: 1)")
+    gen.add_argument("--policies", default=policies.POLICIES_FILE, metavar="FILE",
+                     help=f"policies file (default: {policies.POLICIES_FILE})")
+    gen.set_defaults(func=cmd_generate)
+
+    pol = commands.add_parser("policies", help="list the named generation policies")
+    pol.add_argument("--policies", default=policies.POLICIES_FILE, metavar="FILE",
+                     help=f"policies file (default: {policies.POLICIES_FILE})")
+    pol.set_defaults(func=cmd_policies)
+
+    audit = commands.add_parser("audit", help="find passwords reused across vault entries")
+    audit.add_argument("--key-file", default=vault.KEY_FILE,
+                       help=f"vault key file (default: {vault.KEY_FILE})")
+    audit.set_defaults(func=cmd_audit)
+
+    default_db = os.environ.get(breach.BREACH_ENV) or breach.BREACH_FILE
+    check = commands.add_parser("breach", help="check vault entries (or stdin) against an offline breach dump")
+    check.add_argument("--db", default=default_db,
+                       help=f"Pwned Passwords SHA-1 file, text or compact (default: {default_db})")
+    check.add_argument("--stdin", action="store_true", help="check one password per stdin line instead of the vault")
+    check.add_argument("--key-file", default=vault.KEY_FILE,
+                       help=f"vault key file (default: {vault.KEY_FILE})")
+    check.set_defaults(func=cmd_breach)
+
+    compact = commands.add_parser("breach-compact", help="convert a breach dump to the compact binary format")
+    compact.add_argument("source", help="sorted HASH:COUNT text file")
+    compact.add_argument("output", help="compact file to write")
+    compact.set_defaults(func=cmd_breach_compact)
+
+    imp = commands.add_parser("import", help="import passwords from CSV, JSONL or KeePass XML")
+    imp.add_argument("source", help="file to import")
+    imp.add_argument("-f", "--format", choices=vaultio.IMPORT_FORMATS,
+                     help="input format (default: from the file extension)")
+    imp.add_argument("-w", "--workers", type=int, default=0,
+                     help="encryption processes, 0 for one per CPU (default: 0)")
+    imp.add_argument("--key-file", default=vault.KEY_FILE,
+                     help=f"vault key file (default: {vault.KEY_FILE})")
+    imp.set_defaults(func=cmd_import)
+
+    exp = commands.add_parser("export", help="export the vault as CSV, JSONL, KeePass XML or Bitwarden CSV")
+    exp.add_argument("output", help="file to write")
+    exp.add_argument("-f", "--format", choices=vaultio.FORMATS,
+                     help="output format (default: from the file extension)")
+    exp.add_argument("--key-file", default=vault.KEY_FILE,
+                     help=f"vault key file (default: {vault.KEY_FILE})")
+    exp.set_defaults(func=cmd_export)
+
+    master = commands.add_parser("master-password", help="set or change the vault's master password")
+    master.add_argument("--target-ms", type=int, default=masterkey.TARGET_UNLOCK_MS,
+                        help=f"unlock time to calibrate scrypt for (default: {masterkey.TARGET_UNLOCK_MS})")
+    master.add_argument("--calibrate", action="store_true",
+                        help="only print the scrypt parameters this machine would use")
+    master.add_argument("--key-file", default=vault.KEY_FILE,
+                        help=f"vault key file (default: {vault.KEY_FILE})")
+    master.set_defaults(func=cmd_master_password)
+
+    phrase = commands.add_parser("passphrase", help="generate diceware-style passphrases in bulk")
+    phrase.add_argument("-n", "--count", type=int, default=1, help="number of passphrases (default: 1)")
+    phrase.add_argument("-W", "--wordlist",
+                        help=f"wordlist file, one word per line (default: ${wordlist.WORDLIST_ENV} "
+                             f"or {wordlist.DEFAULT_WORDLIST})")
+    phrase.add_argument("--words", type=int, default=wordlist.DEFAULT_WORDS,
+                        help=f"words per passphrase (default: {wordlist.DEFAULT_WORDS})")
+    phrase.add_argument("-s", "--separator", default=wordlist.DEFAULT_SEPARATOR,
+                        help=f"text between words (default: '{wordlist.DEFAULT_SEPARATOR}')")
+    phrase.add_argument("-f", "--format", choices=FORMATS, default="plain", help="output format (default: plain)")
+    phrase.add_argument("-o", "--output", default="-", help="output file, '-' for stdout (default)")
+    phrase.set_defaults(func=cmd_passphrase)
+    return parser
+
+
+def main(argv=None):
+    """Parse the command line and run the selected subcommand."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "workers", 1) == 0:
+        args.workers = os.cpu_count() or 1
+    try:
+        return args.func(args)
+    except ValueError as e:
+        parser.error(str(e))
+    except BrokenPipeError:
+        # Reader went away (e.g. piped into head); silence the flush at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
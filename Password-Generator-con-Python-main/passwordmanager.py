@@ -1,20 +1,62 @@
+import time
+
+# Taken before anything else is imported so the startup report covers imports
+startup_started = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
-import secrets
-import string
-from PIL import Image, ImageTk
+from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
 from datetime import datetime
-import json
+from concurrent.futures import ThreadPoolExecutor
 import os
+import queue
 import sys
-from cryptography.fernet import Fernet
+import threading
+import breach
+import generator
+import history
+import masterkey
+import metrics
+import policies
+import strength
+import vault
+from labelindex import LabelIndex
+
+# Session history, a ring buffer that wipes entries as they fall out
+password_history = history.PasswordHistory()
+
+# Widgets of the history window while it is open
+history_text = None
+history_info = None
+
+# Rows that exist in the vault window's table at any time
+VAULT_VISIBLE_ROWS = 12
+
+# Vault reads and writes run one at a time on this thread so Tk never blocks
+vault_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault")
 
-# Global list to store password history
-password_history = []
+# How often the Tk loop checks on background vault work (ms)
+BACKGROUND_POLL_MS = 50
 
-# Encryption setup
-KEY_FILE = "password_vault.key"
-VAULT_FILE = "password_vault.encrypted"
+# Longest password the length spinbox offers
+MAX_LENGTH = 128
+
+# Combobox entry that means "use the checkboxes below"
+CUSTOM_POLICY = "Custom"
+
+# Strength meter colour per rating
+STRENGTH_COLOURS = {
+    "Very weak": "#D32F2F",
+    "Weak": "#F57C00",
+    "Reasonable": "#C0A000",
+    "Strong": "#388E3C",
+    "Very strong": "#1B5E20",
+}
+
+# How often the diagnostics window refreshes (ms)
+DIAGNOSTICS_REFRESH_MS = 1000
+
+# Set PASSWORD_GENERATOR_STARTUP_TIMING=1 to print time to first frame and to assets loaded
+STARTUP_TIMING = bool(os.environ.get("PASSWORD_GENERATOR_STARTUP_TIMING"))
 
 # ADD THIS FUNCTION - Critical for executable to find images!
 def resource_path(relative_path):
@@ -26,62 +68,131 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def get_or_create_key():
-    """Get encryption key or create new one."""
-    if os.path.exists(KEY_FILE):
-        with open(KEY_FILE, 'rb') as f:
-            return f.read()
-    else:
-        key = Fernet.generate_key()
-        with open(KEY_FILE, 'wb') as f:
-            f.write(key)
-        return key
-
-def load_saved_passwords():
+def load_saved_passwords(progress=None, cancel=None):
     """Load and decrypt saved passwords from vault."""
     try:
-        key = get_or_create_key()
-        cipher = Fernet(key)
-        
-        with open(VAULT_FILE, 'rb') as f:
-            encrypted_data = f.read()
-        
-        decrypted_data = cipher.decrypt(encrypted_data)
-        return json.loads(decrypted_data.decode())
-    except FileNotFoundError:
-        return []
+        return vault.get_session().records(progress, cancel)
+    except vault.OperationCancelled:
+        raise
     except Exception as e:
         print(f"Could not load saved passwords: {e}")
         return []
 
-def save_passwords_to_vault(passwords):
-    """Encrypt and save passwords to vault."""
+def append_password_to_vault(entry):
+    """Encrypt one password entry and append it to the vault."""
     try:
-        key = get_or_create_key()
-        cipher = Fernet(key)
-        
-        json_data = json.dumps(passwords, indent=2)
-        encrypted_data = cipher.encrypt(json_data.encode())
-        
-        with open(VAULT_FILE, 'wb') as f:
-            f.write(encrypted_data)
+        vault.get_session().append(entry)
         return True
     except Exception as e:
-        print(f"Could not save passwords: {e}")
+        print(f"Could not save password: {e}")
         return False
 
-def resize_background(event):
-    """Resize background image when window is resized."""
-    global bg_photo, original_image
+def clear_vault():
+    """Delete every saved password from the vault."""
     try:
-        new_width = event.width
-        new_height = event.height
-        resized_image = original_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        bg_photo = ImageTk.PhotoImage(resized_image)
-        bg_label.config(image=bg_photo)
-        bg_label.image = bg_photo
-    except:
-        pass
+        vault.get_session().clear()
+        return True
+    except Exception as e:
+        print(f"Could not delete passwords: {e}")
+        return False
+
+def unlock_vault(then, parent=None):
+    """Make sure the vault key is available before then() runs.
+
+    Returns True if the vault has no master password or is already
+    unlocked, so the caller can carry on. Otherwise asks for the master
+    password, derives the key on the vault thread (about TARGET_UNLOCK_MS,
+    more on slower machines) and returns False; then() is called from the
+    Tk loop once the vault is unlocked, and never if the user cancels.
+    """
+    if vault.is_unlocked() or not masterkey.is_protected():
+        return True
+    parent = parent or root
+    password = simpledialog.askstring("Unlock Vault", "Master password:", show="*", parent=parent)
+    if password is None:
+        return False
+    parent.config(cursor="watch")
+    
+    def on_done(session, error):
+        if parent.winfo_exists():
+            parent.config(cursor="")
+        if isinstance(error, masterkey.MasterPasswordError):
+            messagebox.showerror("Wrong Password", "That master password doesn't unlock the vault.",
+                                 parent=parent)
+            # Ask again
+            if unlock_vault(then, parent):
+                then()
+        elif error:
+            messagebox.showerror("Error", f"Could not unlock the vault: {error}", parent=parent)
+        else:
+            then()
+    
+    run_in_background(lambda progress, cancel: vault.unlock_session(password), on_done)
+    return False
+
+def set_master_password(parent):
+    """Set a master password for the vault key, or change the existing one."""
+    protected = masterkey.is_protected()
+    current = None
+    if protected:
+        current = simpledialog.askstring("Master Password", "Current master password:", show="*", parent=parent)
+        if current is None:
+            return
+    new = simpledialog.askstring("Master Password", "New master password:", show="*", parent=parent)
+    if not new:
+        return
+    if new != simpledialog.askstring("Master Password", "Repeat the new master password:", show="*",
+                                     parent=parent):
+        messagebox.showerror("Master Password", "The passwords don't match.", parent=parent)
+        return
+    
+    def work(progress, cancel):
+        if protected:
+            masterkey.change_master_password(current, new)
+        else:
+            # Make sure the key exists (and the session holds it) before it is wrapped
+            vault.get_session()
+            masterkey.set_master_password(new, vault.KEY_FILE)
+        return masterkey.load_params()
+    
+    def on_done(params, error):
+        if isinstance(error, masterkey.MasterPasswordError):
+            messagebox.showerror("Master Password", "The current master password is wrong.", parent=parent)
+        elif error:
+            messagebox.showerror("Master Password", f"Could not set the master password: {error}", parent=parent)
+        else:
+            messagebox.showinfo("Master Password",
+                                f"Master password set. Unlocking takes about {params['ms']} ms on this machine.",
+                                parent=parent)
+    
+    # Calibrating and deriving the key takes a second or so; keep the UI responsive
+    run_in_background(work, on_done)
+
+def run_in_background(work, on_done, on_progress=None):
+    """Run work(progress, cancel) on the vault thread and report back on the Tk loop.
+
+    on_done(result, error) and on_progress(done, total) are only ever called
+    from the Tk main loop. Returns an Event; setting it cancels the work and
+    suppresses on_done.
+    """
+    updates = queue.Queue()
+    cancel = threading.Event()
+    future = vault_executor.submit(work, lambda done, total: updates.put((done, total)), cancel)
+    
+    def poll():
+        latest = None
+        while not updates.empty():
+            latest = updates.get_nowait()
+        if latest is not None and on_progress is not None and not cancel.is_set():
+            on_progress(*latest)
+        if not future.done():
+            root.after(BACKGROUND_POLL_MS, poll)
+        elif not cancel.is_set():
+            error = future.exception()
+            on_done(None if error else future.result(), error)
+    
+    root.after(BACKGROUND_POLL_MS, poll)
+    return cancel
 
 def generate_password():
     """Generate password based on UI selections."""
@@ -91,75 +202,125 @@ def generate_password():
         if length < 4:
             messagebox.showwarning("Invalid Length", "Password length must be at least 4")
             return
-        
-        characters = ""
-        password = []
-
-        if uppercase_var.get():
-            characters += string.ascii_uppercase
-            password.append(secrets.choice(string.ascii_uppercase))
-
-        if lowercase_var.get():
-            characters += string.ascii_lowercase
-            password.append(secrets.choice(string.ascii_lowercase))
-
-        if digits_var.get():
-            characters += string.digits
-            password.append(secrets.choice(string.digits))
-
-        if symbols_var.get():
-            characters += string.punctuation
-            password.append(secrets.choice(string.punctuation))
-
-        if not characters:
-            messagebox.showwarning("No characters selected", "Please select at least one character type")
+        if length > MAX_LENGTH:
+            messagebox.showwarning("Invalid Length", f"Password length can be at most {MAX_LENGTH}")
             return
         
-        for _ in range(length - len(password)):
-            password.append(secrets.choice(characters))
+        policy = saved_policies.get(policy_var.get())
+        if policy is not None:
+            result = policy.generate(length)
+        else:
+            if not (uppercase_var.get() or lowercase_var.get() or digits_var.get() or symbols_var.get()):
+                messagebox.showwarning("No characters selected", "Please select at least one character type")
+                return
 
-        import random
-        random.shuffle(password)
-        result = ''.join(password)
+            result = generator.generate_password(length,
+                                                 uppercase=uppercase_var.get(),
+                                                 lowercase=lowercase_var.get(),
+                                                 digits=digits_var.get(),
+                                                 symbols=symbols_var.get())
 
         password_entry.delete(0, tk.END)
         password_entry.insert(0, result)
         
+        warn_if_breached(result)
+        
         # Add to history
         add_to_history(result)
 
-    except ValueError:
-        messagebox.showerror("Invalid Input", "Please enter a valid number for length.")
+    except ValueError as e:
+        if policy_var.get() in saved_policies and length_var.get().isdigit():
+            # The number was fine; the policy can't be met at this length
+            messagebox.showerror("Policy", str(e))
+        else:
+            messagebox.showerror("Invalid Input", "Please enter a valid number for length.")
+
+def warn_if_breached(password):
+    """Warn when a password is in the local breach database, if one is installed."""
+    try:
+        breaches = breach.open_default()
+        seen = breaches.count(password) if breaches is not None else 0
+    except (OSError, ValueError) as e:
+        print(f"Could not check breached passwords: {e}")
+        return
+    if seen:
+        messagebox.showwarning("Breached Password",
+                               f"This password appears {seen:,} times in known data breaches.\n\n"
+                               "Generate another one, or use a longer length or a different policy.")
+
+def selected_charset():
+    """Return the compiled charset for the current policy or checkboxes."""
+    policy = saved_policies.get(policy_var.get())
+    if policy is not None:
+        return policy.charset
+    return generator.get_charset(uppercase_var.get(), lowercase_var.get(),
+                                 digits_var.get(), symbols_var.get())
+
+def update_strength(*args):
+    """Refresh the strength meter; estimates are memoized per (charset, length)."""
+    try:
+        length = int(length_var.get())
+        charset = selected_charset()
+    except (ValueError, tk.TclError):
+        strength_label.config(text="Strength: —", fg="#7CB68C")
+        return
+    if length < generator.MIN_LENGTH or length < charset.required:
+        strength_label.config(text="Strength: length too short", fg=STRENGTH_COLOURS["Very weak"])
+        return
+    if length > MAX_LENGTH:
+        # Typed past the spinbox limit; don't estimate arbitrarily long passwords on the Tk thread
+        strength_label.config(text=f"Strength: length above {MAX_LENGTH}", fg="#7CB68C")
+        return
+    bits = strength.policy_entropy(charset, length)
+    name = strength.rating(bits)
+    strength_label.config(text=f"Strength: {name} ({bits:.0f} bits)", fg=STRENGTH_COLOURS[name])
+
+def on_policy_selected(event=None):
+    """Apply the chosen policy's length and lock the checkboxes while it is active."""
+    policy = saved_policies.get(policy_var.get())
+    state = tk.NORMAL if policy is None else tk.DISABLED
+    for button in option_buttons:
+        button.config(state=state)
+    if policy is not None:
+        length_var.set(str(policy.length))
 
 def add_to_history(password):
     """Add password to history with timestamp."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    password_history.append({
-        'password': password,
-        'time': timestamp,
-        'length': len(password)
-    })
-    
-    # Keep only last 10 passwords in session history
-    if len(password_history) > 10:
-        password_history.pop(0)
+    entry, evicted = password_history.add(password)
+    if history_text is None:
+        return
+    if evicted is None and len(password_history) == 1:
+        # Replaces the "no passwords" placeholder
+        update_history_display()
+        return
+    # Newest first: the new line goes under the header and the evicted one,
+    # now the last line, is removed; the rest of the text is left alone
+    history_text.insert("3.0", format_history_line(entry))
+    if evicted is not None:
+        last = len(password_history) + 3
+        history_text.delete(f"{last}.0", f"{last + 1}.0")
+    update_history_info()
+
+def format_history_line(entry):
+    return f"{entry.time} | {entry.password:<43} | {entry.length:>2}\n"
+
+def update_history_info():
+    history_info.config(text=f"Last {len(password_history)} generated passwords (newest first):")
 
 def update_history_display():
-    """Update the history display in the popup window."""
+    """Redraw the whole history window (used on open, clear and resize)."""
     history_text.delete(1.0, tk.END)
+    update_history_info()
     
-    if not password_history:
+    if not len(password_history):
         history_text.insert(tk.END, "No passwords generated yet...")
         history_text.tag_add("center", "1.0", "end")
         history_text.tag_config("center", justify='center', foreground='#7CB68C')
         return
     
-    history_text.insert(tk.END, "Time     | Password                                    | Length\n")
-    history_text.insert(tk.END, "-" * 70 + "\n")
-    
-    for entry in reversed(password_history):
-        line = f"{entry['time']} | {entry['password']:<43} | {entry['length']:>2}\n"
-        history_text.insert(tk.END, line)
+    lines = ["Time     | Password                                    | Length\n", "-" * 70 + "\n"]
+    lines.extend(format_history_line(entry) for entry in password_history.newest_first())
+    history_text.insert(tk.END, "".join(lines))
 
 def save_password_with_label():
     """Save current password to encrypted vault with a label."""
@@ -168,6 +329,8 @@ def save_password_with_label():
     if not password:
         messagebox.showwarning("No Password", "Please generate a password first!")
         return
+    if not unlock_vault(save_password_with_label):
+        return
     
     # Create dialog to get label
     label_window = tk.Toplevel(root)
@@ -202,45 +365,53 @@ def save_password_with_label():
             messagebox.showwarning("No Label", "Please enter a label!")
             return
         
-        # Load existing passwords
-        saved_passwords = load_saved_passwords()
-        
-        # Add new password
-        saved_passwords.append({
+        # Append the new password; existing records are left untouched
+        entry = {
             'label': label,
             'password': password,
             'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'length': len(password)
-        })
+        }
         
-        # Save to vault
-        if save_passwords_to_vault(saved_passwords):
-            messagebox.showinfo("Saved!", f"Password saved as '{label}' in encrypted vault!")
-            label_window.destroy()
-        else:
-            messagebox.showerror("Error", "Could not save password to vault!")
+        def on_saved(saved, error):
+            if saved:
+                messagebox.showinfo("Saved!", f"Password saved as '{label}' in encrypted vault!")
+                if label_window.winfo_exists():
+                    label_window.destroy()
+            else:
+                messagebox.showerror("Error", "Could not save password to vault!")
+                if label_window.winfo_exists():
+                    save_button.config(state=tk.NORMAL, text="💾 Save")
+        
+        # Save to vault without blocking the rest of the UI
+        save_button.config(state=tk.DISABLED, text="Saving...")
+        run_in_background(lambda progress, cancel: append_password_to_vault(entry), on_saved)
     
     button_frame = tk.Frame(label_window, bg="#E8F4ED")
     button_frame.pack(pady=15)
     
-    tk.Button(button_frame, text="💾 Save", command=save_it,
-             bg="#4CAF50", fg="white", font=("Arial", 11, "bold"),
-             padx=20, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    save_button = tk.Button(button_frame, text="💾 Save", command=save_it,
+                            bg="#4CAF50", fg="white", font=("Arial", 11, "bold"),
+                            padx=20, pady=5, cursor="hand2", relief="flat")
+    save_button.pack(side=tk.LEFT, padx=5)
     
     tk.Button(button_frame, text="✖ Cancel", command=label_window.destroy,
              bg="#FF6B6B", fg="white", font=("Arial", 11, "bold"),
              padx=20, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
     
     # Bind Enter key to save
-    label_entry.bind('<Return>', lambda e: save_it())
+    label_entry.bind('<Return>', lambda e: save_it() if save_button['state'] == tk.NORMAL else None)
 
 def view_saved_passwords():
     """View all saved passwords in the vault."""
-    saved_passwords = load_saved_passwords()
+    if not unlock_vault(view_saved_passwords):
+        return
+    # Filled in by the background load once the vault is decrypted
+    saved_passwords = []
     
     vault_window = tk.Toplevel(root)
     vault_window.title("Password Vault")
-    vault_window.geometry("800x500")
+    vault_window.geometry("900x560")
     vault_window.configure(bg="#E8F4ED")
     vault_window.resizable(False, False)
     
@@ -255,9 +426,8 @@ def view_saved_passwords():
     
     # Military robot icon for Vault - UPDATED with resource_path
     try:
-        vault_icon = Image.open(resource_path("vault_icon.png"))
-        vault_icon = vault_icon.resize((60, 60), Image.Resampling.LANCZOS)
-        vault_icon_photo = ImageTk.PhotoImage(vault_icon)
+        import rendering
+        vault_icon_photo = rendering.load_photo(resource_path("vault_icon.png"), (60, 60))
         
         icon_lbl = tk.Label(vault_window, image=vault_icon_photo, bg="#E8F4ED")
         icon_lbl.image = vault_icon_photo
@@ -270,76 +440,294 @@ def view_saved_passwords():
             font=("Arial", 18, "bold"), bg="#E8F4ED", fg="#2D5F3F").pack(pady=(0, 10))
     
     # Info
-    tk.Label(vault_window, text=f"Total saved passwords: {len(saved_passwords)}", 
-            font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F").pack(pady=5)
+    info_lbl = tk.Label(vault_window, text="Loading vault...", 
+                        font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F")
+    info_lbl.pack(pady=5)
     
-    # Passwords display
+    load_progress = ttk.Progressbar(vault_window, mode="determinate", length=300)
+    load_progress.pack(pady=(0, 5))
+    
+    # Search box
+    search_frame = tk.Frame(vault_window, bg="#E8F4ED")
+    search_frame.pack(padx=30, fill="x")
+    
+    tk.Label(search_frame, text="🔍 Search label:", font=("Arial", 10),
+            bg="#E8F4ED", fg="#2D5F3F").pack(side=tk.LEFT, padx=(0, 5))
+    
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(search_frame, textvariable=search_var, font=("Arial", 10),
+                            bg="#F5FAF7", fg="#2D5F3F", relief="flat", bd=1,
+                            highlightthickness=1, highlightbackground="#9DC2A8",
+                            highlightcolor="#FF8C42")
+    search_entry.pack(side=tk.LEFT, fill="x", expand=True, ipady=2)
+    search_entry.focus()
+    
+    # Passwords display. The tree only ever holds VAULT_VISIBLE_ROWS rows;
+    # scrolling changes which records they show, so opening and scrolling
+    # cost the same for 10 or 100,000 saved passwords.
     vault_frame = tk.Frame(vault_window, bg="#9DC2A8", bd=2)
     vault_frame.pack(pady=10, padx=30, fill=tk.BOTH, expand=True)
     
-    vault_text = scrolledtext.ScrolledText(
-        vault_frame,
-        font=("Courier", 9),
-        bg="#F5FAF7",
-        fg="#2D5F3F",
-        wrap=tk.NONE,
-        relief="flat",
-        bd=0,
-        padx=10,
-        pady=10
-    )
-    vault_text.pack(fill=tk.BOTH, expand=True)
+    style = ttk.Style(vault_window)
+    style.configure("Vault.Treeview", font=("Courier", 9), background="#F5FAF7",
+                    fieldbackground="#F5FAF7", foreground="#2D5F3F")
+    style.configure("Vault.Treeview.Heading", font=("Arial", 9, "bold"), foreground="#2D5F3F")
     
-    # Display passwords
-    if not saved_passwords:
-        vault_text.insert(tk.END, "No saved passwords yet.\n\nGenerate a password and click the 💾 button to save it!")
-    else:
-        vault_text.insert(tk.END, "Label                    | Password                          | Date                | Length\n")
-        vault_text.insert(tk.END, "-" * 100 + "\n")
-        
-        for entry in reversed(saved_passwords):
-            line = f"{entry['label']:<24} | {entry['password']:<33} | {entry['date']:<19} | {entry['length']:>2}\n"
-            vault_text.insert(tk.END, line)
+    vault_tree = ttk.Treeview(vault_frame, columns=("label", "password", "date", "length"),
+                              show="headings", height=VAULT_VISIBLE_ROWS,
+                              selectmode="browse", style="Vault.Treeview")
+    for column, heading, width, anchor in (("label", "Label", 200, "w"),
+                                           ("password", "Password", 300, "w"),
+                                           ("date", "Date", 150, "w"),
+                                           ("length", "Length", 60, "e")):
+        vault_tree.heading(column, text=heading, anchor=anchor)
+        vault_tree.column(column, width=width, anchor=anchor, stretch=(column == "password"))
+    
+    vault_scrollbar = ttk.Scrollbar(vault_frame, orient=tk.VERTICAL)
+    vault_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    vault_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    
+    row_ids = [vault_tree.insert("", tk.END, values=("", "", "", ""))
+               for _ in range(VAULT_VISIBLE_ROWS)]
+    
+    # Positions (into saved_passwords) of the rows being shown, newest first,
+    # the position of the first visible row and the lazily built label index
+    view = {"rows": range(0), "top": 0, "index": None, "loaded": False}
+    
+    def refresh_rows():
+        rows = view["rows"]
+        top = view["top"]
+        for offset, row_id in enumerate(row_ids):
+            if top + offset < len(rows):
+                entry = saved_passwords[rows[top + offset]]
+                vault_tree.item(row_id, values=(entry['label'], entry['password'],
+                                                entry['date'], entry['length']))
+            else:
+                vault_tree.item(row_id, values=("", "", "", ""))
+        if rows:
+            vault_scrollbar.set(top / len(rows), min(1.0, (top + VAULT_VISIBLE_ROWS) / len(rows)))
+        else:
+            vault_scrollbar.set(0.0, 1.0)
+    
+    def scroll_to(top):
+        max_top = max(0, len(view["rows"]) - VAULT_VISIBLE_ROWS)
+        view["top"] = max(0, min(int(top), max_top))
+        refresh_rows()
+    
+    def on_scrollbar(action, amount, unit=None):
+        if action == "moveto":
+            scroll_to(float(amount) * len(view["rows"]))
+        elif action == "scroll":
+            step = VAULT_VISIBLE_ROWS if unit == "pages" else 1
+            scroll_to(view["top"] + int(amount) * step)
+    
+    def on_mousewheel(event):
+        if event.num == 4 or event.delta > 0:
+            scroll_to(view["top"] - 3)
+        else:
+            scroll_to(view["top"] + 3)
+        return "break"
+    
+    vault_scrollbar.config(command=on_scrollbar)
+    vault_tree.bind("<MouseWheel>", on_mousewheel)
+    vault_tree.bind("<Button-4>", on_mousewheel)
+    vault_tree.bind("<Button-5>", on_mousewheel)
+    vault_tree.bind("<Prior>", lambda e: scroll_to(view["top"] - VAULT_VISIBLE_ROWS))
+    vault_tree.bind("<Next>", lambda e: scroll_to(view["top"] + VAULT_VISIBLE_ROWS))
+    
+    def show_total():
+        if saved_passwords:
+            info_lbl.config(text=f"Total saved passwords: {len(saved_passwords)}")
+        else:
+            info_lbl.config(text="No saved passwords yet. Generate a password and click the 💾 button to save it!")
+    
+    def on_search(*args):
+        if not view["loaded"]:
+            return  # still loading; the search is applied once the records arrive
+        # The label index is only built once the user actually searches
+        if view["index"] is None:
+            view["index"] = LabelIndex([entry['label'] for entry in saved_passwords])
+        view["rows"] = view["index"].search(search_var.get().strip())
+        view["top"] = 0
+        refresh_rows()
+        if search_var.get().strip():
+            info_lbl.config(text=f"Showing {len(view['rows'])} of {len(saved_passwords)} saved passwords")
+        else:
+            show_total()
+    
+    search_var.trace_add("write", on_search)
+    refresh_rows()
+    
+    def on_load_progress(done, total):
+        load_progress.config(maximum=max(total, 1), value=done)
+        info_lbl.config(text=f"Loading vault... {done}/{total}")
+    
+    def on_loaded(records, error):
+        if not vault_window.winfo_exists():
+            return
+        load_progress.pack_forget()
+        if error:
+            messagebox.showerror("Error", f"Could not load the vault: {error}")
+        saved_passwords.extend(records or [])
+        view["rows"] = range(len(saved_passwords) - 1, -1, -1)
+        view["loaded"] = True
+        on_search()
+    
+    cancel_load = run_in_background(load_saved_passwords, on_loaded, on_load_progress)
+    
+    def close_vault():
+        cancel_load.set()
+        if view.get("cancel_check") is not None:
+            view["cancel_check"].set()
+        vault_window.destroy()
+    
+    vault_window.protocol("WM_DELETE_WINDOW", close_vault)
+    
+    def forget_records(event):
+        # The window's copy of the records is its own to drop, however it closes
+        if event.widget is vault_window:
+            for entry in saved_passwords:
+                entry.clear()
+            saved_passwords.clear()
+            view["rows"] = []
+    
+    vault_window.bind("<Destroy>", forget_records, add="+")
     
     # Buttons
     button_frame = tk.Frame(vault_window, bg="#E8F4ED")
     button_frame.pack(pady=15)
     
     def copy_from_vault():
-        try:
-            selection = vault_text.get(tk.SEL_FIRST, tk.SEL_LAST)
-            root.clipboard_clear()
-            root.clipboard_append(selection)
-            messagebox.showinfo("Copied", "Selected text copied to clipboard!")
-        except:
-            messagebox.showwarning("No Selection", "Please select text to copy!")
+        selection = vault_tree.selection()
+        offset = row_ids.index(selection[0]) if selection else -1
+        if offset < 0 or view["top"] + offset >= len(view["rows"]):
+            messagebox.showwarning("No Selection", "Please select a password to copy!")
+            return
+        entry = saved_passwords[view["rows"][view["top"] + offset]]
+        root.clipboard_clear()
+        root.clipboard_append(entry['password'])
+        messagebox.showinfo("Copied", f"Password for '{entry['label']}' copied to clipboard!")
     
     def delete_vault():
         if saved_passwords:
             response = messagebox.askyesno("Delete Vault", 
                                           "⚠️ Are you sure you want to delete ALL saved passwords?\n\nThis cannot be undone!")
             if response:
-                if save_passwords_to_vault([]):
-                    messagebox.showinfo("Deleted", "All passwords have been deleted from vault!")
-                    vault_window.destroy()
+                def on_deleted(deleted, error):
+                    if deleted:
+                        messagebox.showinfo("Deleted", "All passwords have been deleted from vault!")
+                        if vault_window.winfo_exists():
+                            vault_window.destroy()
+                    else:
+                        messagebox.showerror("Error", "Could not delete the vault!")
+                
+                run_in_background(lambda progress, cancel: clear_vault(), on_deleted)
         else:
             messagebox.showinfo("Empty", "Vault is already empty!")
     
-    tk.Button(button_frame, text="📋 Copy Selection", command=copy_from_vault,
+    def check_strength():
+        if not view["loaded"] or not saved_passwords:
+            messagebox.showinfo("Empty", "There are no saved passwords to check yet.")
+            return
+        
+        def on_checked(weak, error):
+            if not vault_window.winfo_exists():
+                return
+            load_progress.pack_forget()
+            if error:
+                messagebox.showerror("Error", f"Could not check the vault: {error}")
+                return
+            view["rows"] = [position for position, bits, name, warning in weak]
+            view["top"] = 0
+            refresh_rows()
+            if weak:
+                position, bits, name, warning = weak[0]
+                info_lbl.config(text=f"{len(weak)} of {len(saved_passwords)} passwords are below "
+                                     f"{strength.WEAK_BITS} bits; weakest first "
+                                     f"('{saved_passwords[position]['label']}': {bits:.0f} bits"
+                                     f"{', ' + warning if warning else ''})")
+            else:
+                info_lbl.config(text=f"All {len(saved_passwords)} saved passwords look strong")
+        
+        info_lbl.config(text="Checking password strength...")
+        load_progress.config(value=0)
+        load_progress.pack(after=info_lbl, pady=(0, 5))
+        def on_check_progress(done, total):
+            load_progress.config(maximum=max(total, 1), value=done)
+            info_lbl.config(text=f"Checking password strength... {done}/{total}")
+        
+        def check(progress, cancel):
+            try:
+                breaches = breach.open_default()
+            except (OSError, ValueError) as e:
+                print(f"Could not open the breach database: {e}")
+                breaches = None
+            return strength.audit(records, progress=progress, cancel=cancel, breaches=breaches)
+        
+        records = list(saved_passwords)
+        view["cancel_check"] = run_in_background(check, on_checked, on_check_progress)
+    
+    def find_reused():
+        if not view["loaded"] or not saved_passwords:
+            messagebox.showinfo("Empty", "There are no saved passwords to check yet.")
+            return
+        
+        def on_found(groups, error):
+            if not vault_window.winfo_exists():
+                return
+            if error:
+                messagebox.showerror("Error", f"Could not audit the vault: {error}")
+                return
+            # The session hands back copies; match them to the rows by content
+            by_content = {}
+            for position, entry in enumerate(saved_passwords):
+                by_content.setdefault((entry['label'], entry['password'], entry['date']), []).append(position)
+            rows = []
+            for group in groups:
+                for record in group:
+                    candidates = by_content.get((record['label'], record['password'], record['date']))
+                    if candidates:
+                        rows.append(candidates.pop())
+            view["rows"] = rows
+            view["top"] = 0
+            refresh_rows()
+            if groups:
+                info_lbl.config(text=f"{len(rows)} entries share a password with another entry "
+                                     f"({len(groups)} distinct passwords)")
+            else:
+                info_lbl.config(text="No password is used more than once")
+        
+        run_in_background(lambda progress, cancel: vault.get_session().reused(), on_found)
+    
+    vault_tree.bind("<Double-1>", lambda e: copy_from_vault())
+    
+    tk.Button(button_frame, text="📋 Copy Password", command=copy_from_vault,
              bg="#2196F3", fg="white", font=("Arial", 10, "bold"),
              padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
     
+    tk.Button(button_frame, text="🛡️ Check Strength", command=check_strength,
+             bg="#FF8C42", fg="white", font=("Arial", 10, "bold"),
+             padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    
+    tk.Button(button_frame, text="♻️ Reused", command=find_reused,
+             bg="#9C27B0", fg="white", font=("Arial", 10, "bold"),
+             padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    
+    tk.Button(button_frame, text="🔑 Master Password", command=lambda: set_master_password(vault_window),
+             bg="#607D8B", fg="white", font=("Arial", 10, "bold"),
+             padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    
     tk.Button(button_frame, text="🗑️ Delete All", command=delete_vault,
              bg="#FF6B6B", fg="white", font=("Arial", 10, "bold"),
              padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
     
-    tk.Button(button_frame, text="✖ Close", command=vault_window.destroy,
+    tk.Button(button_frame, text="✖ Close", command=close_vault,
              bg="#5FA877", fg="white", font=("Arial", 10, "bold"),
              padx=20, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
 
 def show_history_window():
     """Open a new window showing password history."""
-    global history_text
+    global history_text, history_info
     
     history_window = tk.Toplevel(root)
     history_window.title("Password History")
@@ -358,9 +746,8 @@ def show_history_window():
     
     # Blue dizzy robot icon for History - UPDATED with resource_path
     try:
-        history_icon = Image.open(resource_path("history_icon.png"))
-        history_icon = history_icon.resize((60, 60), Image.Resampling.LANCZOS)
-        history_icon_photo = ImageTk.PhotoImage(history_icon)
+        import rendering
+        history_icon_photo = rendering.load_photo(resource_path("history_icon.png"), (60, 60))
         
         icon_lbl = tk.Label(history_window, image=history_icon_photo, bg="#E8F4ED")
         icon_lbl.image = history_icon_photo
@@ -374,9 +761,40 @@ def show_history_window():
     title.pack(pady=(0, 10))
     
     # Info label
-    info = tk.Label(history_window, text=f"Last {len(password_history)} generated passwords (newest first):", 
-                   font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F")
-    info.pack(pady=5)
+    info_frame = tk.Frame(history_window, bg="#E8F4ED")
+    info_frame.pack(pady=5)
+    
+    history_info = tk.Label(info_frame, font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F")
+    history_info.pack(side=tk.LEFT)
+    
+    # History capacity
+    tk.Label(info_frame, text="   Keep last", font=("Arial", 10),
+             bg="#E8F4ED", fg="#2D5F3F").pack(side=tk.LEFT)
+    capacity_var = tk.StringVar(value=str(password_history.capacity))
+    
+    def apply_capacity(event=None):
+        # Applied on Enter, focus-out and the arrows only: a half-typed value
+        # such as the "1" on the way to "1000" would wipe entries for good
+        try:
+            capacity = int(capacity_var.get())
+        except ValueError:
+            capacity = 0
+        if capacity < 1:
+            capacity_var.set(str(password_history.capacity))
+            return
+        if capacity != password_history.capacity:
+            password_history.resize(capacity)
+            capacity_var.set(str(password_history.capacity))
+            # Focus-out also fires while the window is being torn down
+            if history_window.winfo_exists():
+                update_history_display()
+    
+    capacity_spinbox = tk.Spinbox(info_frame, from_=1, to=history.MAX_CAPACITY, textvariable=capacity_var,
+                                  command=apply_capacity, width=7, font=("Arial", 10), relief="flat", bd=1,
+                                  bg="#F5FAF7", fg="#2D5F3F")
+    capacity_spinbox.pack(side=tk.LEFT, padx=5)
+    capacity_spinbox.bind("<Return>", apply_capacity)
+    capacity_spinbox.bind("<FocusOut>", apply_capacity)
     
     # History text area with frame
     history_frame = tk.Frame(history_window, bg="#9DC2A8", bd=2)
@@ -395,6 +813,15 @@ def show_history_window():
     )
     history_text.pack(fill=tk.BOTH, expand=True)
     
+    window_text = history_text
+    
+    def on_history_closed(event):
+        global history_text, history_info
+        # Only forget the widgets if a newer history window hasn't replaced them
+        if event.widget is history_window and history_text is window_text:
+            history_text = history_info = None
+    
+    history_window.bind("<Destroy>", on_history_closed)
     update_history_display()
     
     # Buttons frame
@@ -417,13 +844,13 @@ def show_history_window():
 
 def clear_history():
     """Clear all password history."""
-    global password_history
-    if password_history:
+    if len(password_history):
         response = messagebox.askyesno("Clear History", 
                                        "Are you sure you want to clear all password history?")
         if response:
-            password_history = []
-            update_history_display()
+            password_history.clear()
+            if history_text is not None:
+                update_history_display()
             messagebox.showinfo("Cleared", "Password history has been cleared!")
     else:
         messagebox.showinfo("Empty", "History is already empty!")
@@ -436,6 +863,83 @@ def copy_to_clipboard():
         root.clipboard_append(password)
         messagebox.showinfo("Copied", "Password copied to clipboard")
 
+def format_metrics(snapshot):
+    """Render a metrics snapshot as the text shown in the diagnostics window."""
+    if not snapshot["counters"] and not snapshot["timings"]:
+        return "Nothing recorded yet." if snapshot["enabled"] else "Metrics are disabled. Click 'Enable' to start collecting."
+    
+    lines = [f"{'Timing':<22} {'count':>7} {'mean ms':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}",
+             "-" * 76]
+    for name, timing in snapshot["timings"].items():
+        lines.append(f"{name:<22} {timing['count']:>7} {timing['mean_ms']:>9.3f} {timing['p50_ms']:>8.3f} "
+                     f"{timing['p95_ms']:>8.3f} {timing['p99_ms']:>8.3f} {timing['max_ms']:>8.3f}")
+    lines += ["", f"{'Counter':<22} {'value':>10}", "-" * 33]
+    for name, value in snapshot["counters"].items():
+        lines.append(f"{name:<22} {value:>10}")
+    return "\n".join(lines)
+
+def show_diagnostics_window(event=None):
+    """Open the performance diagnostics window (F12)."""
+    diagnostics_window = tk.Toplevel(root)
+    diagnostics_window.title("Diagnostics")
+    diagnostics_window.geometry("720x420")
+    diagnostics_window.configure(bg="#E8F4ED")
+    
+    tk.Label(diagnostics_window, text="📈 Performance Diagnostics", 
+            font=("Arial", 16, "bold"), bg="#E8F4ED", fg="#2D5F3F").pack(pady=(15, 10))
+    
+    metrics_frame = tk.Frame(diagnostics_window, bg="#9DC2A8", bd=2)
+    metrics_frame.pack(padx=20, fill=tk.BOTH, expand=True)
+    
+    metrics_text = scrolledtext.ScrolledText(metrics_frame, font=("Courier", 9), bg="#F5FAF7",
+                                             fg="#2D5F3F", wrap=tk.NONE, relief="flat", bd=0,
+                                             padx=10, pady=10)
+    metrics_text.pack(fill=tk.BOTH, expand=True)
+    
+    def refresh_metrics():
+        if not diagnostics_window.winfo_exists():
+            return
+        metrics_text.delete(1.0, tk.END)
+        metrics_text.insert(tk.END, format_metrics(metrics.snapshot()))
+        toggle_btn.config(text="⏸ Disable" if metrics.enabled else "▶ Enable")
+        diagnostics_window.after(DIAGNOSTICS_REFRESH_MS, refresh_metrics)
+    
+    def toggle_metrics():
+        metrics.enable(not metrics.enabled)
+        refresh_metrics()
+    
+    def export_metrics():
+        path = filedialog.asksaveasfilename(parent=diagnostics_window, defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")],
+                                            initialfile="password_generator_metrics.json")
+        if path:
+            try:
+                metrics.export_json(path)
+                messagebox.showinfo("Exported", f"Metrics written to {path}", parent=diagnostics_window)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not export metrics: {e}", parent=diagnostics_window)
+    
+    button_frame = tk.Frame(diagnostics_window, bg="#E8F4ED")
+    button_frame.pack(pady=10)
+    
+    toggle_btn = tk.Button(button_frame, command=toggle_metrics, bg="#FF8C42", fg="white",
+                           font=("Arial", 10, "bold"), padx=15, pady=5, cursor="hand2", relief="flat")
+    toggle_btn.pack(side=tk.LEFT, padx=5)
+    
+    tk.Button(button_frame, text="🗑️ Reset", command=lambda: (metrics.reset(), refresh_metrics()),
+             bg="#FF6B6B", fg="white", font=("Arial", 10, "bold"),
+             padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    
+    tk.Button(button_frame, text="💾 Export JSON", command=export_metrics,
+             bg="#2196F3", fg="white", font=("Arial", 10, "bold"),
+             padx=15, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    
+    tk.Button(button_frame, text="✖ Close", command=diagnostics_window.destroy,
+             bg="#5FA877", fg="white", font=("Arial", 10, "bold"),
+             padx=20, pady=5, cursor="hand2", relief="flat").pack(side=tk.LEFT, padx=5)
+    
+    refresh_metrics()
+
 # Main window setup
 root = tk.Tk()
 root.title("Password Generator")
@@ -443,32 +947,64 @@ root.geometry("900x500")
 root.minsize(700, 450)
 
 # Set the app icon - UPDATED with resource_path
+# (the .png fallback needs Pillow and is loaded with the other images below)
 try:
     root.iconbitmap(resource_path("icon.ico"))
     print("Loaded .ico icon")
+    ico_loaded = True
 except:
+    ico_loaded = False
+
+# Background label; the image itself is loaded once the window is on screen
+root.configure(bg="#7CB68C")
+bg_label = tk.Label(root, bg="#7CB68C")
+bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+
+def load_assets():
+    """Decode and scale images after the first frame so they don't delay startup."""
+    global icon_photo, background_renderer
+    # Pillow is only imported here, after the window has been painted
+    import rendering
+    
+    if not ico_loaded:
+        try:
+            icon_photo = rendering.load_photo(resource_path("icon.png"))
+            root.iconphoto(True, icon_photo)
+            print("Loaded .png icon")
+        except Exception as e:
+            print(f"Could not load icon: {e}")
+    
+    # Load background image - UPDATED with resource_path
     try:
-        icon_image = Image.open(resource_path("icon.png"))
-        icon_photo = ImageTk.PhotoImage(icon_image)
-        root.iconphoto(True, icon_photo)
-        print("Loaded .png icon")
+        # Debounced, cached rendering instead of a LANCZOS resize per event
+        background_renderer = rendering.BackgroundRenderer(
+            root, bg_label, rendering.load_image(resource_path("background.png")))
+        background_renderer.show((root.winfo_width(), root.winfo_height()))
+        root.bind('<Configure>', background_renderer.on_configure)
     except Exception as e:
-        print(f"Could not load icon: {e}")
-
-# Load background image - UPDATED with resource_path
-try:
-    original_image = Image.open(resource_path("background.png"))
-    bg_image = original_image.resize((900, 500), Image.Resampling.LANCZOS)
-    bg_photo = ImageTk.PhotoImage(bg_image)
+        print(f"Could not load background image: {e}")
     
-    bg_label = tk.Label(root, image=bg_photo)
-    bg_label.image = bg_photo
-    bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+    # Pre-scale the popup icons so the first History/Vault click is instant
+    for name in ("history_icon.png", "vault_icon.png"):
+        try:
+            rendering.load_photo(resource_path(name), (60, 60))
+        except Exception as e:
+            print(f"Could not load {name}: {e}")
     
-    root.bind('<Configure>', resize_background)
-except Exception as e:
-    print(f"Could not load background image: {e}")
-    root.configure(bg="#7CB68C")
+    if STARTUP_TIMING:
+        print(f"Startup: assets ready after {(time.perf_counter() - startup_started) * 1000:.0f} ms")
+
+def on_first_map(event):
+    """Start the deferred asset loading once the main window is mapped."""
+    if event.widget is not root:
+        return
+    root.unbind('<Map>')
+    if STARTUP_TIMING:
+        print(f"Startup: first frame after {(time.perf_counter() - startup_started) * 1000:.0f} ms")
+    # Idle callbacks run in order, so this lands after the pending redraws
+    root.after_idle(load_assets)
+
+root.bind('<Map>', on_first_map)
 
 # UI Frame with green-tinted glass effect
 main_frame = tk.Frame(root, bg="#E8F4ED", bd=0, relief="flat")
@@ -491,7 +1027,7 @@ length_frame.pack(pady=10)
 tk.Label(length_frame, text="Password Length:", font=("Arial", 11), 
          bg="#E8F4ED", fg="#2D5F3F").pack(side=tk.LEFT, padx=5)
 length_var = tk.StringVar(value="16")
-length_spinbox = tk.Spinbox(length_frame, from_=4, to=128, textvariable=length_var, 
+length_spinbox = tk.Spinbox(length_frame, from_=4, to=MAX_LENGTH, textvariable=length_var, 
                             width=10, font=("Arial", 11), relief="flat", bd=1,
                             bg="#F5FAF7", fg="#2D5F3F")
 length_spinbox.pack(side=tk.LEFT)
@@ -508,18 +1044,41 @@ lowercase_var = tk.BooleanVar(value=True)
 digits_var = tk.BooleanVar(value=True)
 symbols_var = tk.BooleanVar(value=True)
 
-tk.Checkbutton(options_frame, text="Uppercase (A-Z)", variable=uppercase_var, 
-               font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F", 
-               activebackground="#E8F4ED", selectcolor="#C8E6D4").pack(anchor="w", pady=2)
-tk.Checkbutton(options_frame, text="Lowercase (a-z)", variable=lowercase_var, 
-               font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F", 
-               activebackground="#E8F4ED", selectcolor="#C8E6D4").pack(anchor="w", pady=2)
-tk.Checkbutton(options_frame, text="Digits (0-9)", variable=digits_var, 
-               font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F", 
-               activebackground="#E8F4ED", selectcolor="#C8E6D4").pack(anchor="w", pady=2)
-tk.Checkbutton(options_frame, text="Symbols (@#!€$...)", variable=symbols_var, 
-               font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F", 
-               activebackground="#E8F4ED", selectcolor="#C8E6D4").pack(anchor="w", pady=2)
+option_buttons = [
+    tk.Checkbutton(options_frame, text=text, variable=variable,
+                   font=("Arial", 10), bg="#E8F4ED", fg="#2D5F3F",
+                   activebackground="#E8F4ED", selectcolor="#C8E6D4")
+    for text, variable in (("Uppercase (A-Z)", uppercase_var),
+                           ("Lowercase (a-z)", lowercase_var),
+                           ("Digits (0-9)", digits_var),
+                           ("Symbols (@#!€$...)", symbols_var))
+]
+for button in option_buttons:
+    button.pack(anchor="w", pady=2)
+
+# Named policies (built-in plus password_policies.json next to the vault)
+try:
+    saved_policies = policies.load_policies()
+except (OSError, ValueError) as e:
+    print(f"Could not load policies: {e}")
+    saved_policies = {}
+
+policy_frame = tk.Frame(main_frame, bg="#E8F4ED")
+policy_frame.pack()
+tk.Label(policy_frame, text="Policy:", font=("Arial", 10),
+         bg="#E8F4ED", fg="#2D5F3F").pack(side=tk.LEFT, padx=5)
+policy_var = tk.StringVar(value=CUSTOM_POLICY)
+policy_combo = ttk.Combobox(policy_frame, textvariable=policy_var, state="readonly", width=18,
+                            values=[CUSTOM_POLICY] + sorted(saved_policies))
+policy_combo.pack(side=tk.LEFT)
+policy_combo.bind("<<ComboboxSelected>>", on_policy_selected)
+
+# Strength meter, recomputed from a cache whenever an option changes
+strength_label = tk.Label(main_frame, text="", font=("Arial", 9, "bold"), bg="#E8F4ED")
+strength_label.pack(pady=(5, 0))
+for variable in (length_var, uppercase_var, lowercase_var, digits_var, symbols_var, policy_var):
+    variable.trace_add("write", update_strength)
+update_strength()
 
 # Generate button with ORANGE color
 generate_btn = tk.Button(main_frame, text="Generate Password", command=generate_password,
@@ -567,4 +1126,7 @@ info_label = tk.Label(main_frame, text="💾 Save  📋 Copy  📜 History  🔐
                      font=("Arial", 8), bg="#E8F4ED", fg="#7CB68C")
 info_label.pack(pady=(10, 5))
 
+# Hidden diagnostics window
+root.bind('<F12>', show_diagnostics_window)
+
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,353 @@
+"""Local password service: newline-delimited JSON over a Unix socket or localhost TCP.
+
+Each request is one JSON object per line and gets one JSON line back, in
+order, echoing its "id" if it had one:
+
+    {"id": 1, "op": "generate", "policy": "strong", "count": 5}
+    {"id": 1, "ok": true, "passwords": ["...", ...]}
+
+Operations:
+
+- generate: "policy" (a named policy) or the checkbox flags "uppercase",
+  "lowercase", "digits", "symbols" (default true), plus "length" and
+  "count" (default 1, at most MAX_COUNT; length at most MAX_LENGTH).
+- lookup: "label"; returns the vault records saved under it.
+- ping, stats.
+
+Generation requests that arrive together are coalesced: every request for
+the same charset and length waiting in one event-loop turn is served from a
+single generator.generate_batch call, i.e. one CSPRNG draw, so many small
+requests cost about as much as one large one. Vault lookups go through one
+VaultSession (the key is read or unlocked once at startup) whose decrypted
+records stay cached by label on a single vault thread, and concurrent
+lookups for the same label share one read.
+
+The Unix socket is created owner-only. Over TCP (the only option on
+Windows) the service listens on 127.0.0.1 only and every request must carry
+the "token" written to TOKEN_FILE at startup, since any local user could
+otherwise connect.
+
+    python passwordservice.py                     # ./password_generator.sock
+    python passwordservice.py --port 8765         # 127.0.0.1:8765 + token file
+"""
+import argparse
+import asyncio
+import getpass
+import hmac
+import json
+import os
+import secrets
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import generator
+import masterkey
+import metrics
+import policies
+import vault
+
+SOCKET_FILE = "password_generator.sock"
+TOKEN_FILE = "password_service.token"
+
+# Largest batch and longest password a single request may ask for
+MAX_COUNT = 10_000
+MAX_LENGTH = 1024
+
+# Longest request line accepted
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Batches expected to draw up to this many characters (count * length,
+# scaled up by the policy's rejection rate) are generated on the event loop
+# (well under a millisecond); larger ones go to a worker thread
+INLINE_CHARS = generator.BATCH_SIZE * 16
+
+OPTION_FLAGS = ("uppercase", "lowercase", "digits", "symbols")
+
+
+class RequestError(ValueError):
+    """A request the service can't serve; reported back to the client."""
+
+
+class GenerationBatcher:
+    """Coalesces generation requests that arrive in the same event-loop turn.
+
+    generate() queues the request and schedules one flush with call_soon;
+    every request queued before the flush runs (i.e. all the connections
+    that had data ready in this turn) shares one generate_batch call per
+    charset and length.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self._pending = {}
+        self._scheduled = False
+        self.requests = 0
+        self.batches = 0
+        self.passwords = 0
+
+    def generate(self, charset, length, count):
+        """Return a future for count passwords from charset at length."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault((charset, length), []).append((count, future))
+        self.requests += 1
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+        return future
+
+    def _flush(self):
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        loop = asyncio.get_running_loop()
+        for (charset, length), waiters in pending.items():
+            total = sum(count for count, _ in waiters)
+            self.batches += 1
+            self.passwords += total
+            metrics.increment("service.batches")
+            try:
+                expected = total * length / max(generator.valid_fraction(charset, length), 1e-9)
+                if expected > INLINE_CHARS:
+                    work = loop.run_in_executor(self.executor, generator.generate_batch, charset, length, total)
+                    work.add_done_callback(lambda done, waiters=waiters: self._deliver(waiters, done))
+                    continue
+                work = loop.create_future()
+                work.set_result(generator.generate_batch(charset, length, total))
+            except Exception as e:
+                # Fail only this group's requests; the other groups in the flush still run
+                work = loop.create_future()
+                work.set_exception(e)
+            self._deliver(waiters, work)
+
+    @staticmethod
+    def _deliver(waiters, done):
+        error = done.exception()
+        passwords = None if error else done.result()
+        start = 0
+        for count, future in waiters:
+            # The client may have gone away and cancelled its request
+            if not future.done():
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(passwords[start:start + count])
+            start += count
+
+
+class PasswordService:
+    """Request dispatch shared by every connection."""
+
+    def __init__(self, session=None, named_policies=None, token=None):
+        self.session = session
+        self.policies = named_policies if named_policies is not None else policies.load_policies()
+        self.token = token
+        # Same single-writer model as the GUI: vault work runs on one thread
+        self.vault_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault")
+        self.batcher = GenerationBatcher()
+        self._lookups = {}
+        self.connections = 0
+
+    def close(self):
+        self.vault_executor.shutdown(wait=False)
+
+    def _find(self, label):
+        # Keep the decrypted records cached (and label-indexed) in the session;
+        # after an idle eviction the next lookup reloads them
+        if not self.session.is_loaded:
+            self.session.records()
+        return self.session.find(label)
+
+    def _charset(self, request):
+        name = request.get("policy")
+        if name is not None:
+            policy = self.policies.get(name)
+            if policy is None:
+                raise RequestError(f"Unknown policy {name!r}")
+            return policy.charset, request.get("length") or policy.length
+        flags = [bool(request.get(flag, True)) for flag in OPTION_FLAGS]
+        return generator.get_charset(*flags), request.get("length") or policies.DEFAULT_LENGTH
+
+    async def generate(self, request):
+        charset, length = self._charset(request)
+        count = request.get("count", 1)
+        if any(not isinstance(value, int) or isinstance(value, bool) for value in (length, count)):
+            raise RequestError("length and count must be integers")
+        if not 1 <= count <= MAX_COUNT:
+            raise RequestError(f"count must be between 1 and {MAX_COUNT}")
+        if length > MAX_LENGTH:
+            raise RequestError(f"length can be at most {MAX_LENGTH}")
+        # Too short for the policy: refuse here rather than fail the shared batch
+        generator._check_length(charset, length)
+        passwords = await self.batcher.generate(charset, length, count)
+        return {"passwords": passwords}
+
+    async def lookup(self, request):
+        if self.session is None:
+            raise RequestError("The vault is not available in this service")
+        label = request.get("label")
+        if not isinstance(label, str):
+            raise RequestError("lookup needs a label")
+        # Concurrent lookups for one label share a single vault read
+        shared = self._lookups.get(label)
+        if shared is None:
+            loop = asyncio.get_running_loop()
+            shared = loop.run_in_executor(self.vault_executor, self._find, label)
+            self._lookups[label] = shared
+            shared.add_done_callback(lambda done: self._lookups.pop(label, None))
+        records = await asyncio.shield(shared)
+        return {"records": [dict(record) for record in records]}
+
+    async def stats(self, request):
+        return {"connections": self.connections,
+                "requests": self.batcher.requests,
+                "batches": self.batcher.batches,
+                "generated": self.batcher.passwords,
+                "vault": self.session is not None}
+
+    async def ping(self, request):
+        return {}
+
+    async def handle(self, request):
+        """Serve one decoded request and return the response object."""
+        response = {"id": request.get("id")} if isinstance(request, dict) and "id" in request else {}
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Requests must be JSON objects")
+            if self.token is not None and not hmac.compare_digest(str(request.get("token", "")), self.token):
+                raise RequestError("Missing or wrong token")
+            handler = {"generate": self.generate, "lookup": self.lookup,
+                       "stats": self.stats, "ping": self.ping}.get(request.get("op"))
+            if handler is None:
+                raise RequestError(f"Unknown op {request.get('op')!r}")
+            with metrics.timed(f"service.{request['op']}"):
+                response.update(await handler(request))
+            response["ok"] = True
+        except ValueError as e:
+            # RequestError, bad lengths from the generator, bad policies
+            response.update(ok=False, error=str(e))
+        except Exception as e:
+            response.update(ok=False, error=f"Internal error: {e}")
+        return response
+
+    async def serve_connection(self, reader, writer):
+        """Answer newline-delimited JSON requests until the client disconnects."""
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than MAX_REQUEST_BYTES; the stream can't be resynchronised
+                    writer.write(b'{"ok": false, "error": "Request too long"}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"ok": False, "error": "Invalid JSON"}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Client went away, or the service is shutting down
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+
+def write_token(path=TOKEN_FILE):
+    """Create a fresh client token, readable by the owner only."""
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, "w") as f:
+        f.write(token + "\n")
+    return token
+
+
+async def start_server(service, socket_path=None, port=None, host="127.0.0.1"):
+    """Start listening on socket_path, or on host:port when port is given."""
+    if port is not None:
+        return await asyncio.start_server(service.serve_connection, host, port, limit=MAX_REQUEST_BYTES)
+    if os.path.exists(socket_path):
+        # Left over from a service that didn't shut down cleanly
+        os.remove(socket_path)
+    # Create the socket owner-only from the start rather than chmod-ing it afterwards
+    umask = os.umask(0o177)
+    try:
+        return await asyncio.start_unix_server(service.serve_connection, socket_path, limit=MAX_REQUEST_BYTES)
+    finally:
+        os.umask(umask)
+
+
+def open_session(key_file):
+    """Open the vault session for the service, asking for the master password if needed.
+
+    Returns None when there's no vault yet.
+    """
+    kdf_file = masterkey.kdf_file_for(key_file)
+    if masterkey.is_protected(kdf_file):
+        key = masterkey.unlock(getpass.getpass("Master password: "), kdf_file)
+        return vault.VaultSession(vault.open_vault(key_file, key))
+    if not os.path.exists(key_file):
+        return None
+    return vault.VaultSession(vault.open_vault(key_file))
+
+
+async def run(args):
+    session = None if args.no_vault else open_session(args.key_file)
+    token = write_token(args.token_file) if args.port is not None else None
+    service = PasswordService(session, policies.load_policies(args.policies), token)
+    if session is not None:
+        # Decrypt once up front so the first lookups don't wait for it
+        await asyncio.get_running_loop().run_in_executor(service.vault_executor, session.records)
+    server = await start_server(service, args.socket, args.port)
+    where = f"127.0.0.1:{args.port} (token in {args.token_file})" if args.port is not None else args.socket
+    vault_state = "with vault lookups" if session is not None else "without vault lookups"
+    print(f"Password service listening on {where}, {vault_state}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+        if args.port is None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def build_parser():
+    """Build the argument parser for the service."""
+    parser = argparse.ArgumentParser(prog="passwordservice", description="Local password generation service")
+    parser.add_argument("--socket", default=SOCKET_FILE, help=f"Unix socket path (default: {SOCKET_FILE})")
+    parser.add_argument("--port", type=int,
+                        help="listen on 127.0.0.1:PORT instead of a Unix socket (always on Windows)")
+    parser.add_argument("--token-file", default=TOKEN_FILE,
+                        help=f"where to write the TCP client token (default: {TOKEN_FILE})")
+    parser.add_argument("--key-file", default=vault.KEY_FILE, help=f"vault key file (default: {vault.KEY_FILE})")
+    parser.add_argument("--no-vault", action="store_true", help="serve generation only, never open the vault")
+    parser.add_argument("--policies", default=policies.POLICIES_FILE, metavar="FILE",
+                        help=f"policies file (default: {policies.POLICIES_FILE})")
+    return parser
+
+
+def main(argv=None):
+    """Parse the command line and run the service until interrupted."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.port is None and not hasattr(socket, "AF_UNIX"):
+        parser.error("Unix sockets aren't available here; use --port")
+    try:
+        asyncio.run(run(args))
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
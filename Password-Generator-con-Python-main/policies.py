@@ -0,0 +1,123 @@
+"""Named password policies stored next to the vault.
+
+A policy is a list of character classes, each with a minimum count,
+plus characters to exclude, an optional no-repeat rule and a default
+length. Policies live in password_policies.json:
+
+    {"policies": [
+        {"name": "router",
+         "classes": [{"chars": "uppercase", "min": 1},
+                     {"chars": "lowercase", "min": 1},
+                     {"chars": "digits", "min": 2},
+                     {"chars": "!#$%&*+-=?@_", "min": 1}],
+         "exclude": "O0Il1",
+         "no_repeat": true,
+         "length": 20}
+    ]}
+
+"chars" is either one of the built-in class names or the literal characters
+allowed. Every policy compiles to a cached generator.CompiledCharset, so
+the lookup tables are built once per policy, not once per password.
+"""
+import json
+import os
+
+import generator
+
+POLICIES_FILE = "password_policies.json"
+
+# Class names usable in "chars"
+NAMED_CLASSES = {
+    "uppercase": generator.UPPERCASE,
+    "lowercase": generator.LOWERCASE,
+    "digits": generator.DIGITS,
+    "symbols": generator.SYMBOLS,
+}
+
+# Characters that are easy to misread or mistype
+AMBIGUOUS = "O0oIl1|`'\""
+
+DEFAULT_LENGTH = 16
+
+# Available even when there is no policies file; entries in the file with
+# the same name take precedence
+BUILTIN_POLICIES = [
+    {"name": "default",
+     "classes": [{"chars": name, "min": 1} for name in NAMED_CLASSES]},
+    {"name": "no-ambiguous",
+     "classes": [{"chars": name, "min": 1} for name in NAMED_CLASSES],
+     "exclude": AMBIGUOUS},
+    {"name": "alphanumeric",
+     "classes": [{"chars": name, "min": 1} for name in ("uppercase", "lowercase", "digits")]},
+    {"name": "strong",
+     "classes": [{"chars": name, "min": 2} for name in NAMED_CLASSES],
+     "no_repeat": True,
+     "length": 24},
+    {"name": "pin",
+     "classes": [{"chars": "digits", "min": 1}],
+     "length": 6},
+]
+
+
+class Policy:
+    """A named set of generation rules."""
+
+    def __init__(self, name, classes, exclude="", no_repeat=False, length=DEFAULT_LENGTH):
+        self.name = name
+        self.classes = [(chars, int(minimum)) for chars, minimum in classes]
+        self.exclude = exclude
+        self.no_repeat = bool(no_repeat)
+        self.length = int(length)
+        self._charset = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a policy from its JSON form."""
+        try:
+            classes = [(spec["chars"], spec.get("min", 1)) for spec in data["classes"]]
+            return cls(data["name"], classes, data.get("exclude", ""),
+                       data.get("no_repeat", False), data.get("length", DEFAULT_LENGTH))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid policy {data!r}: {e}") from e
+
+    @property
+    def charset(self):
+        """The compiled, cached charset for this policy."""
+        if self._charset is None:
+            self._charset = self._compile()
+        return self._charset
+
+    def _compile(self):
+        excluded = set(self.exclude)
+        classes = []
+        minimums = []
+        for chars, minimum in self.classes:
+            chars = NAMED_CLASSES.get(chars, chars)
+            # Drop exclusions and duplicates, keeping the order they were given in
+            chars = "".join(dict.fromkeys(c for c in chars if c not in excluded))
+            if not chars:
+                if minimum:
+                    raise ValueError(f"Policy {self.name!r}: a required class has no characters left")
+                continue
+            classes.append(chars)
+            minimums.append(minimum)
+        return generator.compile_charset(tuple(classes), tuple(minimums), self.no_repeat)
+
+    def generate(self, length=None):
+        """Generate one password under this policy."""
+        return generator.generate_batch(self.charset, length or self.length, 1)[0]
+
+
+def load_policies(path=POLICIES_FILE):
+    """Return {name: Policy} for the built-in policies plus those in path."""
+    entries = list(BUILTIN_POLICIES)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        entries.extend(data.get("policies", []))
+    policies = {}
+    for entry in entries:
+        policy = Policy.from_dict(entry)
+        policies[policy.name] = policy
+    return policies
+
@@ -0,0 +1,173 @@
+"""Password strength estimates.
+
+Two kinds of estimate:
+
+- policy_entropy() is for generated passwords: log2 of the number of
+  passwords the generator can produce for a charset and length, i.e. with
+  the one-per-class (or policy minimum) constraint taken into account.
+  Exact for the class minimums; approximate for no-repeat policies, whose
+  rule generator.valid_fraction folds in as if it were independent.
+- estimate() judges an existing password, e.g. one saved in the vault. It
+  uses zxcvbn when that package is installed and otherwise a small pattern
+  heuristic (common passwords, repeats, sequences, keyboard runs, years).
+"""
+import math
+import re
+from functools import lru_cache
+
+import generator
+import vault
+
+# Lower bound in bits for each rating, strongest first
+RATINGS = (
+    (128, "Very strong"),
+    (80, "Strong"),
+    (60, "Reasonable"),
+    (36, "Weak"),
+    (0, "Very weak"),
+)
+
+# Saved passwords below this many bits are reported by audit()
+WEAK_BITS = 60
+
+# Stand-in for the top of the usual leaked-password lists
+COMMON_PASSWORDS = (
+    "123456", "123456789", "12345678", "12345", "1234567", "1234567890", "111111",
+    "000000", "password", "password1", "qwerty", "qwerty123", "abc123", "iloveyou",
+    "admin", "welcome", "letmein", "monkey", "dragon", "football", "baseball",
+    "sunshine", "princess", "master", "shadow", "superman", "trustno1", "123123",
+    "654321", "666666", "passw0rd", "zaq12wsx", "1q2w3e4r", "qwertyuiop", "asdfghjkl",
+)
+COMMON_RANKS = {password: rank for rank, password in enumerate(COMMON_PASSWORDS, 1)}
+
+KEYBOARD_ROWS = ("1234567890", "qwertyuiop", "asdfghjkl", "zxcvbnm")
+YEAR = re.compile(r"(?:19|20)\d\d")
+
+# Bits credited to a character that continues a repeat, sequence or keyboard run
+PATTERN_CHAR_BITS = 1.0
+
+# zxcvbn gets slow on long inputs and adds nothing past this length
+ZXCVBN_MAX_LENGTH = 100
+
+
+def rating(bits):
+    """Return the rating name for an entropy in bits."""
+    for threshold, name in RATINGS:
+        if bits >= threshold:
+            return name
+    return RATINGS[-1][1]
+
+
+@lru_cache(maxsize=1024)
+def policy_entropy(charset, length):
+    """Bits of entropy of a password generated from charset at length (approximate with no_repeat)."""
+    fraction = generator.valid_fraction(charset, length)
+    if fraction <= 0:
+        return 0.0
+    return length * math.log2(len(charset.alphabet)) + math.log2(fraction)
+
+
+def _pool_size(password):
+    pool = 0
+    if any(c.islower() for c in password):
+        pool += 26
+    if any(c.isupper() for c in password):
+        pool += 26
+    if any(c.isdigit() for c in password):
+        pool += 10
+    if any(c in generator.SYMBOLS for c in password):
+        pool += len(generator.SYMBOLS)
+    if any(not c.isascii() for c in password):
+        pool += 100
+    return max(pool, 1)
+
+
+def _neighbours(a, b):
+    """True when b follows a in the alphabet or on a keyboard row (either way)."""
+    a, b = a.lower(), b.lower()
+    if abs(ord(a) - ord(b)) == 1:
+        return True
+    return any(a in row and b in row and abs(row.index(a) - row.index(b)) == 1 for row in KEYBOARD_ROWS)
+
+
+def _heuristic(password):
+    """Pattern-aware entropy guess used when zxcvbn isn't available."""
+    folded = password.casefold()
+    if folded in COMMON_RANKS:
+        return math.log2(COMMON_RANKS[folded] + 1), "This is a very common password"
+    stripped = folded.rstrip("0123456789!")
+    if stripped in COMMON_RANKS:
+        return math.log2(COMMON_RANKS[stripped] + 1) + 10, "Based on a very common password"
+
+    per_char = math.log2(_pool_size(password))
+    bits = 0.0
+    patterned = 0
+    for i, char in enumerate(password):
+        if i and (char == password[i - 1] or _neighbours(password[i - 1], char)):
+            bits += PATTERN_CHAR_BITS
+            patterned += 1
+        else:
+            bits += per_char
+    # A year is one of ~200 likely values, not four random digits
+    bits -= len(YEAR.findall(password)) * (4 * math.log2(10) - math.log2(200))
+
+    warning = ""
+    if patterned * 2 >= len(password) > 0:
+        warning = "Repeats, sequences and keyboard runs are easy to guess"
+    elif YEAR.search(password):
+        warning = "Years are easy to guess"
+    return max(bits, 0.0), warning
+
+
+@lru_cache(maxsize=None)
+def _load_zxcvbn():
+    """Return zxcvbn's entry point, or None if it isn't installed.
+
+    Imported on first use rather than with this module, which the GUI
+    loads at startup.
+    """
+    try:
+        from zxcvbn import zxcvbn
+    except ImportError:
+        return None
+    return zxcvbn
+
+
+def estimate(password):
+    """Return (bits, rating, warning) for an existing password.
+
+    Deliberately not cached: that would keep plaintext passwords alive.
+    """
+    zxcvbn = _load_zxcvbn()
+    if zxcvbn is not None:
+        result = zxcvbn(password[:ZXCVBN_MAX_LENGTH])
+        bits = result["guesses_log10"] * math.log2(10)
+        warning = result["feedback"]["warning"]
+    else:
+        bits, warning = _heuristic(password)
+    return bits, rating(bits), warning
+
+
+def audit(records, threshold=WEAK_BITS, progress=None, cancel=None, breaches=None):
+    """Return [(position, bits, rating, warning)] for records weaker than threshold, weakest first.
+
+    progress(done, total) and cancel (an Event) work as in vault.Vault.records.
+    With breaches (a breach.BreachDatabase), passwords found in the breach
+    corpus are reported as 0 bits whatever their estimate.
+    """
+    weak = []
+    total = len(records)
+    for position, record in enumerate(records):
+        if cancel is not None and cancel.is_set():
+            raise vault.OperationCancelled()
+        seen = breaches.count(record["password"]) if breaches is not None else 0
+        if seen:
+            weak.append((position, 0.0, RATINGS[-1][1], f"Found {seen:,} times in known breaches"))
+        else:
+            bits, name, warning = estimate(record["password"])
+            if bits < threshold:
+                weak.append((position, bits, name, warning))
+        if progress is not None and (position + 1) % vault.PROGRESS_INTERVAL == 0:
+            progress(position + 1, total)
+    weak.sort(key=lambda item: item[1])
+    return weak
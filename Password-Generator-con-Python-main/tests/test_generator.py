@@ -0,0 +1,109 @@
+"""Tests for the generator's acceptance rules and its valid_fraction estimate.
+
+Run from the app directory with: python -m pytest tests (or python -m unittest discover tests)
+"""
+import itertools
+import os
+import sys
+import unittest
+from unittest import mock
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import generator  # noqa: E402
+
+
+def meets_policy(charset, password):
+    """Check the policy rules directly rather than through charset.pattern."""
+    for chars, minimum in zip(charset.classes, charset.minimums):
+        if sum(c in chars for c in password) < minimum:
+            return False
+    if charset.no_repeat and any(a == b for a, b in zip(password, password[1:])):
+        return False
+    return set(password) <= set(charset.alphabet)
+
+
+def brute_force_fraction(charset, length):
+    """Share of every possible candidate that meets the policy."""
+    candidates = itertools.product(charset.alphabet, repeat=length)
+    accepted = sum(1 for chars in candidates if meets_policy(charset, chars))
+    return accepted / len(charset.alphabet) ** length
+
+
+class ValidFractionTest(unittest.TestCase):
+    def test_matches_enumeration_for_minimums(self):
+        cases = [
+            (("ab", "c", "de"), None),
+            (("ab", "c", "de"), (2, 1, 0)),
+            (("a", "bc", "d"), (1, 2, 1)),
+            (("abc", "d"), (0, 3)),
+        ]
+        for classes, minimums in cases:
+            charset = generator.compile_charset(classes, minimums)
+            for length in range(max(charset.required, 1), 8):
+                with self.subTest(classes=classes, minimums=minimums, length=length):
+                    self.assertAlmostEqual(generator.valid_fraction(charset, length),
+                                           brute_force_fraction(charset, length), places=12)
+
+    def test_no_repeat_is_an_estimate(self):
+        # The repeat rule is folded in as if independent of the minimums, so
+        # it only has to land near the enumerated share
+        charset = generator.compile_charset(("ab", "cd"), no_repeat=True)
+        for length in range(4, 8):
+            with self.subTest(length=length):
+                exact = brute_force_fraction(charset, length)
+                self.assertAlmostEqual(generator.valid_fraction(charset, length), exact, delta=exact * 0.3)
+
+    def test_long_lengths_stay_in_range(self):
+        charset = generator.compile_charset(tuple(generator.get_charset().classes), (2, 2, 2, 2), no_repeat=True)
+        fraction = generator.valid_fraction(charset, 1000)
+        self.assertGreater(fraction, 0.0)
+        self.assertLessEqual(fraction, 1.0)
+
+
+class GenerateBatchTest(unittest.TestCase):
+    def test_pattern_matches_the_rules(self):
+        charset = generator.compile_charset(("ab", "c", "de"), (2, 1, 0), no_repeat=True)
+        for chars in itertools.product(charset.alphabet, repeat=5):
+            candidate = "".join(chars)
+            self.assertEqual(charset.is_valid(candidate), meets_policy(charset, candidate), candidate)
+
+    def test_minimums_and_no_repeat(self):
+        charset = generator.compile_charset(("ABCDEFGH", "abcdefgh", "0123", "!?"), (2, 3, 2, 1), no_repeat=True)
+        for length in (8, 12, 40):
+            passwords = generator.generate_batch(charset, length, 500)
+            self.assertEqual(len(passwords), 500)
+            for password in passwords:
+                self.assertEqual(len(password), length)
+                self.assertTrue(meets_policy(charset, password), password)
+
+    def test_default_charset_has_every_class(self):
+        charset = generator.get_charset()
+        for password in generator.generate_batch(charset, generator.MIN_LENGTH, 2000):
+            self.assertTrue(meets_policy(charset, password), password)
+
+    def test_too_short_is_rejected(self):
+        charset = generator.compile_charset(("ab", "cd"), (3, 3))
+        with self.assertRaises(ValueError):
+            generator.generate_batch(charset, 5, 1)
+        with self.assertRaises(ValueError):
+            generator.generate_batch(generator.get_charset(), generator.MIN_LENGTH - 1, 1)
+
+    def test_unsatisfiable_policy_raises(self):
+        # Passes the up-front length checks, but a no-repeat password over two
+        # letters has to alternate: 2 of the 2 ** 200 candidates, never drawn
+        charset = generator.compile_charset(("a", "b"), no_repeat=True)
+        with mock.patch.object(generator, "MIN_FRUITLESS_BYTES", generator.MAX_DRAW), \
+                mock.patch.object(generator, "MAX_FRUITLESS_BYTES", 4 * generator.MAX_DRAW):
+            with self.assertRaises(ValueError):
+                generator.generate_batch(charset, 200, 1)
+
+    def test_single_character_class_that_must_repeat_is_rejected(self):
+        charset = generator.compile_charset(("a", "bc"), (3, 1), no_repeat=True)
+        with self.assertRaises(ValueError):
+            generator.generate_batch(charset, 4, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
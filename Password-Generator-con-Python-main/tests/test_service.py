@@ -0,0 +1,75 @@
+"""Tests for the local password service's request handling and batching.
+
+Run from the app directory with: python -m pytest tests (or python -m unittest discover tests)
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import generator  # noqa: E402
+import passwordservice  # noqa: E402
+import policies  # noqa: E402
+
+
+BUILTIN = {entry["name"]: policies.Policy.from_dict(entry) for entry in policies.BUILTIN_POLICIES}
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=10))
+
+
+class GenerationBatcherTest(unittest.TestCase):
+    def test_bad_group_does_not_hang_the_batch(self):
+        async def scenario():
+            batcher = passwordservice.GenerationBatcher()
+            # Fails inside the flush itself: valid_fraction can't take a negative length
+            bad = batcher.generate(BUILTIN["strong"].charset, -5, 1)
+            good = batcher.generate(generator.get_charset(), 16, 2)
+            return await asyncio.gather(bad, good, return_exceptions=True)
+
+        bad, good = run(scenario())
+        self.assertIsInstance(bad, Exception)
+        self.assertEqual(len(good), 2)
+        self.assertTrue(all(len(password) == 16 for password in good))
+
+
+class PasswordServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.service = passwordservice.PasswordService(named_policies=BUILTIN)
+
+    def tearDown(self):
+        self.service.close()
+
+    def handle_together(self, *requests):
+        async def scenario():
+            return await asyncio.gather(*(self.service.handle(request) for request in requests))
+        return run(scenario())
+
+    def test_short_length_is_rejected_without_failing_others(self):
+        bad, good = self.handle_together({"id": 1, "op": "generate", "policy": "strong", "length": -5},
+                                          {"id": 2, "op": "generate", "length": 16})
+        self.assertFalse(bad["ok"])
+        self.assertEqual(bad["id"], 1)
+        self.assertTrue(good["ok"])
+        self.assertEqual(len(good["passwords"][0]), 16)
+
+    def test_length_below_policy_minimums_is_rejected(self):
+        # strong needs two characters from each of four classes
+        response, = self.handle_together({"op": "generate", "policy": "strong", "length": 6})
+        self.assertFalse(response["ok"])
+        response, = self.handle_together({"op": "generate", "policy": "strong", "length": 8})
+        self.assertTrue(response["ok"])
+
+    def test_bool_count_and_length_are_rejected(self):
+        for request in ({"op": "generate", "count": True}, {"op": "generate", "length": True}):
+            response, = self.handle_together(request)
+            self.assertFalse(response["ok"])
+            self.assertIn("integers", response["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
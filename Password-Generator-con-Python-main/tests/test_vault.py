@@ -0,0 +1,112 @@
+"""Crash-safety tests for the vault's snapshot, journal and index files.
+
+Run from the app directory with: python -m pytest tests (or python -m unittest discover tests)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import vault  # noqa: E402
+
+
+def record(i):
+    return {"label": f"account-{i}", "password": f"secret-{i}", "date": "2024-01-01 00:00:00", "length": 8}
+
+
+class VaultRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.key = vault.get_or_create_key(os.path.join(self.dir, vault.KEY_FILE))
+        self.vault = self.open()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def open(self):
+        return vault.Vault(self.key, self.path(vault.RECORDS_FILE), self.path(vault.INDEX_FILE),
+                           self.path(vault.JOURNAL_FILE))
+
+    def test_append_compact_reopen(self):
+        self.vault.append_many([record(i) for i in range(5)], auto_compact=False)
+        self.assertTrue(self.vault.compact())
+        self.assertFalse(os.path.exists(self.path(vault.JOURNAL_FILE)))
+        self.vault.append(record(5))
+
+        reopened = self.open()
+        self.assertEqual(reopened.load(), [record(i) for i in range(6)])
+        self.assertEqual(reopened.find("account-2"), [record(2)])
+        self.assertEqual(reopened.find("account-5"), [record(5)])
+        self.assertEqual(len(reopened), 6)
+
+    def test_torn_journal_tail_is_dropped(self):
+        self.vault.append_many([record(i) for i in range(3)], auto_compact=False)
+        # A crash mid-write: the frame header promises more bytes than made it to disk
+        with open(self.path(vault.JOURNAL_FILE), "ab") as f:
+            f.write(vault.FRAME_HEADER.pack(100) + b"partial")
+        os.remove(self.path(vault.INDEX_FILE))
+
+        reopened = self.open()
+        self.assertEqual(reopened.load(), [record(i) for i in range(3)])
+        # Appends after recovery must stay frame-aligned
+        reopened.append(record(3))
+        self.assertEqual(self.open().load(), [record(i) for i in range(4)])
+        self.assertEqual(self.open().find("account-3"), [record(3)])
+
+    def test_torn_journal_header_is_discarded(self):
+        self.vault.append_many([record(i) for i in range(2)], auto_compact=False)
+        self.vault.compact()
+        # Crashed while creating a new journal, before its header was complete
+        with open(self.path(vault.JOURNAL_FILE), "wb") as f:
+            f.write(vault.JOURNAL_MAGIC[:5])
+
+        reopened = self.open()
+        self.assertEqual(reopened.load(), [record(0), record(1)])
+        reopened.append(record(2))
+        self.assertEqual(self.open().load(), [record(i) for i in range(3)])
+
+    def test_stale_journal_after_compaction_rename(self):
+        self.vault.append_many([record(i) for i in range(4)], auto_compact=False)
+        self.vault.compact()
+        self.vault.append_many([record(i) for i in range(4, 7)], auto_compact=False)
+        journal = open(self.path(vault.JOURNAL_FILE), "rb").read()
+        index = open(self.path(vault.INDEX_FILE), "rb").read()
+        self.assertTrue(self.vault.compact())
+
+        # Crash after the new snapshot was renamed into place but before the
+        # journal was removed and the index rewritten
+        with open(self.path(vault.JOURNAL_FILE), "wb") as f:
+            f.write(journal)
+        with open(self.path(vault.INDEX_FILE), "wb") as f:
+            f.write(index)
+
+        reopened = self.open()
+        self.assertEqual(reopened.load(), [record(i) for i in range(7)])
+        self.assertFalse(os.path.exists(self.path(vault.JOURNAL_FILE)))
+        self.assertEqual(reopened.find("account-5"), [record(5)])
+        self.assertEqual(reopened.find("account-1"), [record(1)])
+        reopened.append(record(7))
+        self.assertEqual(self.open().load(), [record(i) for i in range(8)])
+
+    def test_stale_index_is_rebuilt(self):
+        self.vault.append_many([record(i) for i in range(3)], auto_compact=False)
+        index = open(self.path(vault.INDEX_FILE), "rb").read()
+        self.vault.append_many([record(i) for i in range(3, 5)], auto_compact=False)
+        # An index left behind by a crash between the journal write and the index update
+        with open(self.path(vault.INDEX_FILE), "wb") as f:
+            f.write(index)
+
+        reopened = self.open()
+        self.assertEqual(reopened.find("account-4"), [record(4)])
+        self.assertEqual(len(reopened), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,824 @@
+"""Encrypted password vault with per-record encryption and a keyed index.
+
+Records live in two files that share the same frame format, a 4-byte
+big-endian length followed by a Fernet token holding one JSON record:
+
+- the snapshot (password_vault.records): 8-byte magic, 16-byte id of the
+  last journal folded into it, then frames. Only ever replaced atomically.
+- the journal (password_vault.journal): 8-byte magic, 16-byte random id,
+  then frames. New records are appended here and fsynced.
+
+Once the journal grows past COMPACT_JOURNAL_BYTES a background compaction
+writes snapshot + journal to a temporary file, renames it over the snapshot
+and removes the journal. Because the new snapshot remembers the id of the
+journal it absorbed, a crash between the rename and the removal is detected
+on the next open and the stale journal is discarded.
+
+Index file layout: 8-byte magic, 16-byte id of the journal it describes, then
+fixed-size entries holding an HMAC-SHA256 of the record label, the segment
+(snapshot or journal), the offset/length of the frame and an HMAC-SHA256 of
+the password (for reuse audits). The index never contains labels or
+passwords in clear text and can always be rebuilt from the records.
+"""
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import struct
+import threading
+import time
+
+import masterkey
+import metrics
+
+KEY_FILE = "password_vault.key"
+RECORDS_FILE = "password_vault.records"
+JOURNAL_FILE = "password_vault.journal"
+INDEX_FILE = "password_vault.index"
+
+# Single encrypted JSON blob used by earlier versions of the app
+LEGACY_VAULT_FILE = "password_vault.encrypted"
+
+SNAPSHOT_MAGIC = b"PGVAULT2"
+# Snapshot without a journal id header, written by the first record-based format
+SNAPSHOT_MAGIC_V1 = b"PGVAULT1"
+JOURNAL_MAGIC = b"PGVJRNL1"
+# Older index versions are simply rebuilt from the records
+INDEX_MAGIC = b"PGVINDX3"
+
+ID_SIZE = 16
+NO_JOURNAL = bytes(ID_SIZE)
+HEADER_SIZE = 8 + ID_SIZE
+
+SNAPSHOT = 0
+JOURNAL = 1
+
+FRAME_HEADER = struct.Struct(">I")
+# label digest, segment, offset, length, password digest
+INDEX_ENTRY = struct.Struct(">32sBQI32s")
+
+# Journal size that triggers a background compaction
+COMPACT_JOURNAL_BYTES = 256 * 1024
+
+# Copy size used while compacting
+COPY_CHUNK = 1024 * 1024
+
+# Records decrypted between progress reports / cancellation checks
+PROGRESS_INTERVAL = 500
+
+# Seconds without vault activity before a session drops its decrypted records
+SESSION_IDLE_TIMEOUT = 300
+
+
+class OperationCancelled(Exception):
+    """Raised when a long vault operation is cancelled by the caller."""
+
+
+def get_or_create_key(key_file=KEY_FILE):
+    """Get encryption key or create new one.
+
+    Raises masterkey.VaultLocked when the key is protected by a master
+    password; use unlock_session() (or masterkey.unlock) instead.
+    """
+    if masterkey.is_protected(masterkey.kdf_file_for(key_file)):
+        raise masterkey.VaultLocked("The vault is protected by a master password")
+    if os.path.exists(key_file):
+        with metrics.timed("vault.key_load"), open(key_file, 'rb') as f:
+            return f.read()
+    else:
+        from cryptography.fernet import Fernet
+        key = Fernet.generate_key()
+        with open(key_file, 'wb') as f:
+            f.write(key)
+        return key
+
+
+def _read_frames(f, start, end=None):
+    """Yield (offset, token) for every complete frame from start to end (default: end of file)."""
+    f.seek(start)
+    offset = start
+    while end is None or offset + FRAME_HEADER.size <= end:
+        header = f.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        (length,) = FRAME_HEADER.unpack(header)
+        if end is not None and offset + FRAME_HEADER.size + length > end:
+            return
+        token = f.read(length)
+        if len(token) < length:
+            # Torn write at the end of the file; ignore the partial frame
+            return
+        yield offset, token
+        offset += FRAME_HEADER.size + length
+
+
+def _frame_end(entry):
+    return entry[2] + FRAME_HEADER.size + entry[3]
+
+
+def _fsync_directory(path):
+    """Persist a rename on filesystems that need the directory flushed (POSIX only)."""
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy_range(src, dst, start, end):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+class _SharedState:
+    """Lock and compaction state shared by every Vault object on the same files."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.compacting = False
+        # Bumped by clear() so an in-flight compaction knows to give up
+        self.generation = 0
+        # File stamps (before, after) of the last compaction; the records
+        # didn't change, so sessions can keep their cache across it
+        self.last_compaction = None
+        # Streaming reads in progress; compaction waits for them so it never
+        # replaces a file someone has open (which fails on Windows)
+        self.readers = 0
+
+
+_shared_states = {}
+_shared_states_lock = threading.Lock()
+
+
+def _shared_state(records_file):
+    with _shared_states_lock:
+        return _shared_states.setdefault(os.path.abspath(records_file), _SharedState())
+
+
+class Vault:
+    """Append-friendly vault where every record is encrypted on its own."""
+
+    def __init__(self, key, records_file=RECORDS_FILE, index_file=INDEX_FILE, journal_file=JOURNAL_FILE):
+        # Imported here so that starting the app doesn't pay for cryptography
+        from cryptography.fernet import Fernet
+        self.cipher = Fernet(key)
+        self.key = key
+        self.records_file = records_file
+        self.journal_file = journal_file
+        self.index_file = index_file
+        self._paths = (records_file, journal_file)
+        self._state = _shared_state(records_file)
+        # Separate keys for the index digests, so they never reveal anything
+        # about the encryption key itself
+        self._index_key = hmac.new(key, b"label-index", hashlib.sha256).digest()
+        self._password_key = hmac.new(key, b"password-index", hashlib.sha256).digest()
+
+    def file_stamp(self):
+        """(mtime, size) of the snapshot and journal, used to notice changes on disk."""
+        stamp = []
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def label_digest(self, label):
+        """Keyed hash of a label as stored in the index."""
+        return hmac.digest(self._index_key, label.encode("utf-8"), "sha256")
+
+    def password_digest(self, password):
+        """Keyed hash of a password as stored in the index."""
+        return hmac.digest(self._password_key, password.encode("utf-8"), "sha256")
+
+    def _index_entry(self, record, segment, offset, length):
+        return (self.label_digest(record["label"]), segment, offset, length,
+                self.password_digest(record["password"]))
+
+    def seal(self, records):
+        """Encrypt records and compute their index digests, without touching any file.
+
+        Returns (token, label digest, password digest) per record, ready for
+        append_sealed(). Only needs the key, so bulk imports can run it in
+        worker processes.
+        """
+        return [(self._encrypt(record), self.label_digest(record["label"]),
+                 self.password_digest(record["password"])) for record in records]
+
+    def _encrypt(self, record):
+        if not metrics.enabled:
+            return self.cipher.encrypt(json.dumps(record, separators=(",", ":")).encode())
+        with metrics.timed("vault.json_encode"):
+            data = json.dumps(record, separators=(",", ":")).encode()
+        with metrics.timed("vault.encrypt"):
+            return self.cipher.encrypt(data)
+
+    def _decrypt(self, token):
+        if not metrics.enabled:
+            return json.loads(self.cipher.decrypt(token))
+        with metrics.timed("vault.decrypt"):
+            data = self.cipher.decrypt(token)
+        with metrics.timed("vault.json_decode"):
+            return json.loads(data)
+
+    # -- file headers -------------------------------------------------------
+
+    def _snapshot_header(self):
+        """Return (header size, folded journal id) or None when there is no snapshot."""
+        try:
+            with open(self.records_file, "rb") as f:
+                header = f.read(HEADER_SIZE)
+        except FileNotFoundError:
+            return None
+        if header[:8] == SNAPSHOT_MAGIC and len(header) == HEADER_SIZE:
+            return HEADER_SIZE, header[8:]
+        if header[:8] == SNAPSHOT_MAGIC_V1:
+            return 8, NO_JOURNAL
+        raise ValueError(f"{self.records_file} is not a password vault")
+
+    def _journal_id(self):
+        """Return the id of the current journal, or None when there is none."""
+        try:
+            with open(self.journal_file, "rb") as f:
+                header = f.read(HEADER_SIZE)
+        except FileNotFoundError:
+            return None
+        if len(header) < HEADER_SIZE:
+            # Crashed while creating the journal, before any frame was written
+            return None
+        if header[:8] != JOURNAL_MAGIC:
+            raise ValueError(f"{self.journal_file} is not a password vault journal")
+        return header[8:]
+
+    def _header_size(self, segment):
+        if segment == JOURNAL:
+            return HEADER_SIZE
+        snapshot = self._snapshot_header()
+        return snapshot[0] if snapshot else HEADER_SIZE
+
+    def _recover(self):
+        """Discard a journal that a finished compaction already folded in."""
+        journal_id = self._journal_id()
+        snapshot = self._snapshot_header()
+        torn_header = journal_id is None and os.path.exists(self.journal_file)
+        if torn_header or (journal_id and snapshot and snapshot[1] == journal_id):
+            os.remove(self.journal_file)
+
+    # -- index ----------------------------------------------------------------
+
+    def _load_index(self):
+        """Return (journal id, entries) from the index file, or (None, []) if unusable."""
+        try:
+            with open(self.index_file, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None, []
+        if data[:8] != INDEX_MAGIC or len(data) < HEADER_SIZE:
+            return None, []
+        body = data[HEADER_SIZE:]
+        body = body[:len(body) - len(body) % INDEX_ENTRY.size]
+        return data[8:HEADER_SIZE], list(INDEX_ENTRY.iter_unpack(body))
+
+    def _write_index(self, journal_id, entries):
+        """Atomically replace the index file."""
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(INDEX_MAGIC + (journal_id or NO_JOURNAL))
+            f.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in entries))
+        os.replace(tmp, self.index_file)
+
+    def _append_index(self, journal_id, entries):
+        with open(self.index_file, "r+b") as f:
+            f.seek(8)
+            f.write(journal_id)
+            f.seek(0, os.SEEK_END)
+            f.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in entries))
+
+    def _shifted_index(self, snapshot_shift, journal_shift):
+        """Write the index as it will be after a compaction to a temporary file.
+
+        Streams the current index a block of entries at a time, so memory
+        use doesn't grow with the vault. Returns the temporary file's path.
+        """
+        tmp = self.index_file + ".tmp"
+        block = INDEX_ENTRY.size * 4096
+        with open(self.index_file, "rb") as src, open(tmp, "wb") as out:
+            src.seek(HEADER_SIZE)
+            out.write(INDEX_MAGIC + NO_JOURNAL)
+            while True:
+                data = src.read(block)
+                data = data[:len(data) - len(data) % INDEX_ENTRY.size]
+                if not data:
+                    break
+                out.write(b"".join(
+                    INDEX_ENTRY.pack(digest, SNAPSHOT, offset + (journal_shift if segment == JOURNAL else snapshot_shift),
+                                     length, password)
+                    for digest, segment, offset, length, password in INDEX_ENTRY.iter_unpack(data)))
+        return tmp
+
+    def _index_is_current(self):
+        """Cheap check, reading only headers and the last entry, that the index is complete."""
+        try:
+            with open(self.index_file, "rb") as f:
+                header = f.read(HEADER_SIZE)
+                size = f.seek(0, os.SEEK_END)
+                if header[:8] != INDEX_MAGIC or size < HEADER_SIZE + INDEX_ENTRY.size \
+                        or (size - HEADER_SIZE) % INDEX_ENTRY.size:
+                    return False
+                f.seek(size - INDEX_ENTRY.size)
+                last = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+        except FileNotFoundError:
+            return False
+        journal_id = self._journal_id()
+        if header[8:] != (journal_id or NO_JOURNAL):
+            return False
+        segment = JOURNAL if journal_id else SNAPSHOT
+        return last[1] == segment and _frame_end(last) == os.path.getsize(self._paths[segment])
+
+    def _catch_up(self, segment, entries):
+        """Index frames of one segment that the index doesn't know about yet."""
+        path = self._paths[segment]
+        if not os.path.exists(path):
+            return [], bool(entries)
+        size = os.path.getsize(path)
+        header_size = self._header_size(segment)
+        start = _frame_end(entries[-1]) if entries else header_size
+        if start > size:
+            # The index describes a different file; index this one from scratch
+            entries, start = [], header_size
+        if start == size:
+            return entries, False
+
+        entries = list(entries)
+        valid_end = start
+        with open(path, "rb") as f:
+            for offset, token in _read_frames(f, start):
+                entries.append(self._index_entry(self._decrypt(token), segment, offset, len(token)))
+                valid_end = offset + FRAME_HEADER.size + len(token)
+        if valid_end < size:
+            # Drop a half-written frame so later appends stay aligned
+            os.truncate(path, valid_end)
+        return entries, True
+
+    def read_index(self):
+        """Return all index entries, rebuilding any part missing from the index file."""
+        with self._state.lock:
+            self._recover()
+            index_journal, entries = self._load_index()
+            snapshot = self._snapshot_header()
+            journal_id = self._journal_id()
+
+            changed = index_journal is None
+            if snapshot and index_journal not in (None, NO_JOURNAL) and index_journal == snapshot[1]:
+                # The index was written before the last compaction finished
+                entries, changed = [], True
+
+            snapshot_entries = [e for e in entries if e[1] == SNAPSHOT]
+            journal_entries = [e for e in entries if e[1] == JOURNAL]
+            if journal_entries and index_journal != journal_id:
+                journal_entries, changed = [], True
+
+            snapshot_entries, snapshot_changed = self._catch_up(SNAPSHOT, snapshot_entries)
+            journal_entries, journal_changed = self._catch_up(JOURNAL, journal_entries)
+            entries = snapshot_entries + journal_entries
+            rewrite = changed and (entries or index_journal is not None)
+            if rewrite or snapshot_changed or journal_changed:
+                self._write_index(journal_id, entries)
+            return entries
+
+    def __len__(self):
+        return len(self.read_index())
+
+    # -- writing --------------------------------------------------------------
+
+    def append(self, record):
+        """Encrypt one record and append it to the vault."""
+        self.append_many([record])
+
+    def append_many(self, records, auto_compact=True):
+        """Encrypt records and append them to the journal with a single fsync.
+
+        With auto_compact (the default) a large journal is folded into the
+        snapshot in the background; bulk writers pass False and compact once
+        at the end instead.
+        """
+        self.append_sealed(self.seal(records), auto_compact)
+
+    def append_sealed(self, sealed, auto_compact=True):
+        """Append records already encrypted by seal(), with a single fsync."""
+        with self._state.lock:
+            if not self._index_is_current():
+                self.read_index()
+            journal_id = self._journal_id()
+            new_journal = journal_id is None
+            if new_journal:
+                journal_id = secrets.token_bytes(ID_SIZE)
+
+            with open(self.journal_file, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                chunks = []
+                if new_journal:
+                    chunks.append(JOURNAL_MAGIC + journal_id)
+                    offset = HEADER_SIZE
+                entries = []
+                for token, label_digest, password_digest in sealed:
+                    chunks.append(FRAME_HEADER.pack(len(token)) + token)
+                    entries.append((label_digest, JOURNAL, offset, len(token), password_digest))
+                    offset += FRAME_HEADER.size + len(token)
+                with metrics.timed("vault.journal_write"):
+                    f.write(b"".join(chunks))
+                    f.flush()
+                    os.fsync(f.fileno())
+            metrics.increment("vault.records_saved", len(entries))
+
+            if os.path.exists(self.index_file):
+                self._append_index(journal_id, entries)
+            else:
+                self._write_index(journal_id, entries)
+            journal_size = offset
+
+        if auto_compact and journal_size >= COMPACT_JOURNAL_BYTES:
+            self.compact_in_background()
+
+    def compact(self):
+        """Fold the journal into a new snapshot, replacing the old one atomically."""
+        with metrics.timed("vault.compact"):
+            return self._compact()
+
+    def _compact(self):
+        state = self._state
+        with state.lock:
+            if state.compacting or state.readers:
+                return False
+            journal_id = self._journal_id()
+            if journal_id is None:
+                return False
+            if not self._index_is_current():
+                self.read_index()  # also drops any torn frame at the end of the journal
+            state.compacting = True
+            generation = state.generation
+            snapshot = self._snapshot_header()
+            snapshot_size = os.path.getsize(self.records_file) if snapshot else 0
+            journal_end = os.path.getsize(self.journal_file)
+
+        tmp = self.records_file + ".tmp"
+        try:
+            # The bulk of the copy runs without the lock so saves aren't blocked
+            with open(tmp, "wb") as out:
+                out.write(SNAPSHOT_MAGIC + journal_id)
+                if snapshot:
+                    with open(self.records_file, "rb") as src:
+                        _copy_range(src, out, snapshot[0], snapshot_size)
+                with open(self.journal_file, "rb") as src:
+                    _copy_range(src, out, HEADER_SIZE, journal_end)
+
+                with state.lock:
+                    if state.generation != generation:
+                        return False
+                    # Frames saved while we were copying
+                    with open(self.journal_file, "rb") as src:
+                        _copy_range(src, out, journal_end, os.path.getsize(self.journal_file))
+                    out.flush()
+                    os.fsync(out.fileno())
+                    out.close()
+
+                    if not self._index_is_current():
+                        self.read_index()
+                    snapshot_shift = HEADER_SIZE - (snapshot[0] if snapshot else HEADER_SIZE)
+                    journal_shift = snapshot_size - snapshot[0] if snapshot else 0
+                    index_tmp = self._shifted_index(snapshot_shift, journal_shift)
+
+                    before = self.file_stamp()
+                    os.replace(tmp, self.records_file)
+                    _fsync_directory(self.records_file)
+                    os.remove(self.journal_file)
+                    os.replace(index_tmp, self.index_file)
+                    state.last_compaction = (before, self.file_stamp())
+                    return True
+        finally:
+            with state.lock:
+                state.compacting = False
+            for path in (tmp, self.index_file + ".tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def compact_in_background(self):
+        """Start a compaction on a daemon thread unless one is already running."""
+        if self._state.compacting:
+            return
+
+        def run():
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Could not compact vault: {e}")
+
+        threading.Thread(target=run, name="vault-compaction", daemon=True).start()
+
+    def clear(self):
+        """Delete every record from the vault."""
+        with self._state.lock:
+            self._state.generation += 1
+            for path in (self.records_file, self.journal_file, self.index_file):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    # -- reading --------------------------------------------------------------
+
+    def _record_count(self):
+        """Number of records, from the index size when the index is current (call with the lock held)."""
+        if self._index_is_current():
+            return (os.path.getsize(self.index_file) - HEADER_SIZE) // INDEX_ENTRY.size
+        return len(self.read_index())
+
+    def records(self, progress=None, cancel=None):
+        """Yield every decrypted record in insertion order, reading one frame at a time.
+
+        Both segments are opened, and their sizes noted, under the lock, so
+        the read is a consistent snapshot: later saves land past the noted
+        sizes and compaction waits until the read is over. Memory doesn't
+        grow with the vault size.
+
+        progress, if given, is called as progress(done, total) every
+        PROGRESS_INTERVAL records; setting the cancel event stops the read
+        with OperationCancelled.
+        """
+        state = self._state
+        segments = []
+        # Recovery and opening the segments; the frame reads are timed below
+        with state.lock, metrics.timed("vault.read_open"):
+            self._recover()
+            total = self._record_count()
+            for segment, path in enumerate(self._paths):
+                try:
+                    f = open(path, "rb")
+                except FileNotFoundError:
+                    continue
+                segments.append((f, self._header_size(segment), os.fstat(f.fileno()).st_size))
+            state.readers += 1
+        try:
+            done = 0
+            # Time spent in file reads only, not decrypting or in the caller
+            read_time = 0.0
+            for f, start, end in segments:
+                frames = _read_frames(f, start, end)
+                while True:
+                    started = time.perf_counter()
+                    frame = next(frames, None)
+                    read_time += time.perf_counter() - started
+                    if frame is None:
+                        break
+                    token = frame[1]
+                    if done % PROGRESS_INTERVAL == 0:
+                        if cancel is not None and cancel.is_set():
+                            raise OperationCancelled()
+                        if progress is not None:
+                            progress(done, total)
+                    yield self._decrypt(token)
+                    done += 1
+            metrics.record("vault.read", read_time)
+            if progress is not None:
+                progress(done, done)
+        finally:
+            for f, _, _ in segments:
+                f.close()
+            with state.lock:
+                state.readers -= 1
+
+    def load(self, progress=None, cancel=None):
+        """Return every decrypted record as a list."""
+        return list(self.records(progress, cancel))
+
+    def _read_tokens(self, entries):
+        """Read the encrypted tokens of index entries (call with the lock held)."""
+        tokens = []
+        for entry in entries:
+            with open(self._paths[entry[1]], "rb") as f:
+                f.seek(entry[2] + FRAME_HEADER.size)
+                tokens.append(f.read(entry[3]))
+        return tokens
+
+    def find(self, label):
+        """Return the records saved under a label, decrypting only those records."""
+        digest = self.label_digest(label)
+        with self._state.lock:
+            matches = [entry for entry in self.read_index() if hmac.compare_digest(entry[0], digest)]
+            tokens = self._read_tokens(matches)
+        found = []
+        for token in tokens:
+            record = self._decrypt(token)
+            # Guard against (astronomically unlikely) digest collisions
+            if record["label"] == label:
+                found.append(record)
+        return found
+
+    def reused(self):
+        """Return lists of records that share a password, decrypting only those records.
+
+        Records in a group with the same label too are exact duplicates.
+        """
+        with self._state.lock, metrics.timed("vault.audit"):
+            entries = self.read_index()
+            groups = {}
+            for entry in entries:
+                groups.setdefault(entry[4], []).append(entry)
+            tokens = [self._read_tokens(group) for group in groups.values() if len(group) > 1]
+        return [[self._decrypt(token) for token in group] for group in tokens]
+
+
+class VaultSession:
+    """Keeps a vault's cipher and decrypted records in memory between operations.
+
+    The cache is reloaded when the vault files change on disk (size or mtime)
+    and dropped after idle_timeout seconds without use. Dropping clears every
+    cached record dict and the list holding them so no references to the
+    plaintext remain; Python can't overwrite immutable strings in place, so
+    this is the best available effort. Callers get copies of the records, so
+    an eviction never empties data they still hold; dropping those copies is
+    up to them.
+    """
+
+    def __init__(self, vault, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.vault = vault
+        self.idle_timeout = idle_timeout
+        self._lock = threading.RLock()
+        self._records = None
+        self._by_label = None
+        self._stamp = None
+        self._last_used = 0.0
+        self._timer = None
+
+    def _current_stamp(self):
+        """File stamp, ignoring a compaction that only moved records around."""
+        stamp = self.vault.file_stamp()
+        if self._stamp is not None and self.vault._state.last_compaction == (self._stamp, stamp):
+            self._stamp = stamp
+        return stamp
+
+    def _touch(self):
+        self._last_used = time.monotonic()
+        if self._timer is None and self.idle_timeout:
+            self._start_timer(self.idle_timeout)
+
+    def _start_timer(self, delay):
+        self._timer = threading.Timer(delay, self._check_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _check_idle(self):
+        with self._lock:
+            self._timer = None
+            idle = time.monotonic() - self._last_used
+            if idle >= self.idle_timeout:
+                self.evict()
+            else:
+                self._start_timer(self.idle_timeout - idle)
+
+    @property
+    def is_loaded(self):
+        return self._records is not None
+
+    def evict(self):
+        """Drop the decrypted records from memory."""
+        with self._lock:
+            if self._records is not None:
+                for record in self._records:
+                    record.clear()
+                self._records.clear()
+            self._records = None
+            self._by_label = None
+            self._stamp = None
+
+    def records(self, progress=None, cancel=None):
+        """Return every decrypted record, decrypting the vault only when it changed."""
+        with self._lock:
+            stamp = self._current_stamp()
+            if self._records is None or stamp != self._stamp:
+                metrics.increment("vault.session_miss")
+                self.evict()
+                self._records = self.vault.load(progress, cancel)
+                self._stamp = stamp
+            else:
+                metrics.increment("vault.session_hit")
+            self._touch()
+            return [dict(record) for record in self._records]
+
+    def find(self, label):
+        """Return the records saved under a label."""
+        with self._lock:
+            if self._records is not None and self._current_stamp() == self._stamp:
+                self._touch()
+                if self._by_label is None:
+                    # Built on the first cached lookup, so sessions that never search don't pay for it
+                    self._by_label = {}
+                    for record in self._records:
+                        self._by_label.setdefault(record["label"], []).append(record)
+                return [dict(record) for record in self._by_label.get(label, ())]
+        return self.vault.find(label)
+
+    def reused(self):
+        """Return lists of records that share a password (see Vault.reused)."""
+        with self._lock:
+            if self._records is not None and self._current_stamp() == self._stamp:
+                self._touch()
+                groups = {}
+                for record in self._records:
+                    groups.setdefault(record["password"], []).append(record)
+                return [[dict(record) for record in group] for group in groups.values() if len(group) > 1]
+        return self.vault.reused()
+
+    def append(self, record):
+        """Save a record, keeping the cache valid instead of reloading it."""
+        self.append_many([record])
+
+    def append_many(self, records, auto_compact=True):
+        """Save several records, keeping the cache valid instead of reloading it."""
+        with self._lock:
+            cache_valid = self._records is not None and self._current_stamp() == self._stamp
+            self.vault.append_many(records, auto_compact)
+            if cache_valid:
+                added = [dict(record) for record in records]
+                self._records.extend(added)
+                if self._by_label is not None:
+                    for record in added:
+                        self._by_label.setdefault(record["label"], []).append(record)
+                self._stamp = self._current_stamp()
+                self._touch()
+
+    def compact(self):
+        """Compact the vault; the cache stays valid since no record changes."""
+        return self.vault.compact()
+
+    def clear(self):
+        """Delete every record from the vault and the cache."""
+        with self._lock:
+            self.vault.clear()
+            self.evict()
+
+
+def migrate_legacy_vault(vault, legacy_file=LEGACY_VAULT_FILE):
+    """Import a single-blob vault from earlier versions, keeping the old file as a backup."""
+    if not os.path.exists(legacy_file) or any(os.path.exists(path) for path in vault._paths):
+        return 0
+    with open(legacy_file, "rb") as f:
+        records = json.loads(vault.cipher.decrypt(f.read()))
+    vault.append_many(records)
+    vault.compact()
+    os.replace(legacy_file, legacy_file + ".bak")
+    return len(records)
+
+
+def open_vault(key_file=KEY_FILE, key=None):
+    """Open the default vault, migrating the legacy file on first use.
+
+    key, if given, is an already unlocked vault key; otherwise it is read
+    from key_file.
+    """
+    vault = Vault(key or get_or_create_key(key_file))
+    migrated = migrate_legacy_vault(vault)
+    if migrated:
+        print(f"Migrated {migrated} passwords to the new vault format")
+    return vault
+
+
+_default_session = None
+
+
+def get_session(key_file=KEY_FILE):
+    """Return the process-wide session for the default vault, opening it once.
+
+    The key is read (or unlocked) once and kept for the life of the session.
+    """
+    global _default_session
+    if _default_session is None:
+        _default_session = VaultSession(open_vault(key_file))
+    return _default_session
+
+
+def is_unlocked():
+    """True once the process-wide session exists, i.e. its key is in memory."""
+    return _default_session is not None
+
+
+def unlock_session(password, kdf_file=masterkey.KDF_FILE):
+    """Derive the vault key from the master password and open the process-wide session.
+
+    Runs the KDF once; later saves and loads reuse the key held by the session.
+    Raises masterkey.MasterPasswordError for a wrong password.
+    """
+    global _default_session
+    key = masterkey.unlock(password, kdf_file)
+    _default_session = VaultSession(open_vault(key=key))
+    return _default_session
@@ -0,0 +1,318 @@
+"""Streaming import and export of vault records.
+
+Formats:
+
+- csv: label,password,date,length (plus username,url,notes when present).
+  On import the header is matched loosely, so CSV exports from Bitwarden
+  (name, login_username, login_password, login_uri), Chrome/Firefox
+  (name/url, username, password) and KeePass/KeePassXC (Title/Account,
+  Username/Login Name, Password, URL/Web Site, Notes/Comments) load as is.
+- jsonl: one JSON record per line.
+- keepass-xml: KeePass 2 unencrypted XML export; read with iterparse so only
+  one entry is in memory at a time. Save dates travel as the entry's
+  <Times><CreationTime>.
+- bitwarden-csv: export only, the column layout Bitwarden imports.
+
+Imports are parsed, encrypted (optionally in worker processes) and appended
+IMPORT_CHUNK records at a time, with one journal fsync per chunk, and
+compacted once at the end; exports decrypt and write one record at a time.
+"""
+import csv
+import json
+import os
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+from xml.sax.saxutils import escape
+
+import metrics
+
+FORMATS = ("csv", "jsonl", "keepass-xml", "bitwarden-csv")
+IMPORT_FORMATS = ("csv", "jsonl", "keepass-xml")
+
+# Records encrypted and appended per journal write
+IMPORT_CHUNK = 5000
+
+# Optional fields carried along with label and password
+EXTRA_FIELDS = ("username", "url", "notes")
+
+# Lower-cased source column -> record field, first match wins
+COLUMN_ALIASES = {
+    "label": ("label", "name", "title", "account"),
+    "password": ("password", "login_password"),
+    "username": ("username", "login_username", "login name", "user name"),
+    "url": ("url", "login_uri", "web site", "website", "uri"),
+    "notes": ("notes", "comments", "comment"),
+    "date": ("date",),
+}
+
+# Record dates are local time; KeePass stores UTC times in this form
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+KEEPASS_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+BITWARDEN_COLUMNS = ("folder", "favorite", "type", "name", "notes", "fields", "reprompt",
+                     "login_uri", "login_username", "login_password", "login_totp")
+
+
+def guess_format(path):
+    """Pick an import/export format from a file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    return {".jsonl": "jsonl", ".ndjson": "jsonl", ".xml": "keepass-xml"}.get(extension, "csv")
+
+
+def make_record(label, password, date=None, **extra):
+    """Build a vault record the way the GUI saves them."""
+    record = {
+        "label": label,
+        "password": password,
+        "date": date or datetime.now().strftime(DATE_FORMAT),
+        "length": len(password),
+    }
+    for field in EXTRA_FIELDS:
+        if extra.get(field):
+            record[field] = extra[field]
+    return record
+
+
+# -- reading ------------------------------------------------------------------
+
+def read_csv(f):
+    """Yield records from a CSV file with any of the supported headers."""
+    reader = csv.reader(f)
+    header = [column.strip().lower() for column in next(reader, [])]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in header:
+                columns[field] = header.index(alias)
+                break
+    if "password" not in columns:
+        raise ValueError("CSV file has no password column")
+    label_column = columns.get("label", columns.get("url", columns.get("username")))
+    for row in reader:
+        values = {field: row[column] if column < len(row) else "" for field, column in columns.items()}
+        if not values["password"]:
+            continue
+        label = row[label_column] if label_column is not None and label_column < len(row) else ""
+        values.pop("label", None)
+        yield make_record(label or "(imported)", values.pop("password"), values.pop("date", None),
+                          **values)
+
+
+def read_jsonl(f):
+    """Yield records from a JSON Lines file."""
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {number} is not valid JSON: {e}") from None
+        if not isinstance(data, dict):
+            raise ValueError(f"Line {number} is not a JSON object")
+        if not isinstance(data.get("password"), str):
+            raise ValueError(f"Line {number} has no password")
+        extra = {field: data.get(field) for field in EXTRA_FIELDS}
+        yield make_record(data.get("label") or "(imported)", data["password"], data.get("date"), **extra)
+
+
+def _from_keepass_time(text):
+    """Local record date for a KeePass <CreationTime>, or None if it can't be read."""
+    try:
+        moment = datetime.strptime(text.strip(), KEEPASS_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    except (AttributeError, ValueError):
+        return None
+    return moment.astimezone().strftime(DATE_FORMAT)
+
+
+def _to_keepass_time(date):
+    """KeePass <CreationTime> for a local record date, or None if it can't be read."""
+    try:
+        moment = datetime.strptime(date, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    return moment.astimezone(timezone.utc).strftime(KEEPASS_TIME_FORMAT)
+
+
+def read_keepass_xml(f):
+    """Yield records from a KeePass 2 XML export, one <Entry> at a time.
+
+    Each entry is detached from its group once read, so the parsed tree
+    never grows with the number of entries.
+    """
+    fields = {"Title": "label", "Password": "password", "UserName": "username", "URL": "url", "Notes": "notes"}
+    # Open elements, outermost first; the last one is the parent of the element that just ended
+    stack = []
+    for event, element in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        # Entries under <History> are old versions of an entry; skip them
+        if element.tag != "Entry" or any(parent.tag == "History" for parent in stack):
+            continue
+        values = {}
+        for string in element.findall("String"):
+            field = fields.get(string.findtext("Key"))
+            if field:
+                values[field] = string.findtext("Value") or ""
+        date = _from_keepass_time(element.findtext("Times/CreationTime"))
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+        if values.get("password"):
+            yield make_record(values.pop("label", "") or "(imported)", values.pop("password"), date, **values)
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "keepass-xml": read_keepass_xml}
+
+
+_worker_vault = None
+
+
+def _init_worker(key, records_file, index_file, journal_file):
+    global _worker_vault
+    import vault
+    _worker_vault = vault.Vault(key, records_file, index_file, journal_file)
+
+
+def _seal_chunk(records):
+    return _worker_vault.seal(records)
+
+
+def _seal_parallel(target, chunks, workers):
+    """Yield (chunk, sealed) with encryption spread over worker processes, in order."""
+    # Only imports run with --workers get here
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(target.key, target.records_file, target.index_file,
+                                       target.journal_file)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_seal_chunk, chunk)))
+            if len(pending) >= workers * 2:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def import_records(target, path, fmt=None, progress=None, workers=1):
+    """Append every record in path to target (a vault.Vault); returns the count.
+
+    Records are encrypted IMPORT_CHUNK at a time, across `workers` processes
+    when more than one is given, and appended with one fsync per chunk.
+    progress(imported), if given, is called after every chunk.
+    """
+    fmt = fmt or guess_format(path)
+    if fmt not in READERS:
+        raise ValueError(f"Cannot import {fmt} files")
+    imported = 0
+    mode = "rb" if fmt == "keepass-xml" else "r"
+    with open(path, mode, **({} if mode == "rb" else {"newline": "", "encoding": "utf-8-sig"})) as f:
+        records = READERS[fmt](f)
+        chunks = iter(lambda: list(islice(records, IMPORT_CHUNK)), [])
+        if workers > 1:
+            sealed_chunks = _seal_parallel(target, chunks, workers)
+        else:
+            sealed_chunks = ((chunk, target.seal(chunk)) for chunk in chunks)
+        for chunk, sealed in sealed_chunks:
+            with metrics.timed("vault.import_chunk"):
+                target.append_sealed(sealed, auto_compact=False)
+            imported += len(chunk)
+            if progress is not None:
+                progress(imported)
+    if imported:
+        target.compact()
+    return imported
+
+
+# -- writing ------------------------------------------------------------------
+
+def _open_private(path):
+    """Open path for writing with owner-only permissions; exports are plaintext."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    return open(fd, "w", newline="", encoding="utf-8", buffering=1024 * 1024)
+
+
+def write_csv(records, out):
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(("label", "password", "date", "length") + EXTRA_FIELDS)
+    count = 0
+    for record in records:
+        writer.writerow([record.get("label"), record.get("password"), record.get("date"), record.get("length")]
+                        + [record.get(field, "") for field in EXTRA_FIELDS])
+        count += 1
+    return count
+
+
+def write_jsonl(records, out):
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def write_bitwarden_csv(records, out):
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(BITWARDEN_COLUMNS)
+    count = 0
+    for record in records:
+        writer.writerow(["", "", "login", record.get("label"), record.get("notes", ""), "", "0",
+                         record.get("url", ""), record.get("username", ""), record.get("password"), ""])
+        count += 1
+    return count
+
+
+def write_keepass_xml(records, out):
+    def string(key, value, protect=False):
+        attribute = ' ProtectInMemory="True"' if protect else ""
+        return (f"\t\t\t\t<String><Key>{key}</Key><Value{attribute}>{escape(str(value or ''))}"
+                f"</Value></String>\n")
+
+    out.write('<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+              "<KeePassFile>\n\t<Root>\n\t\t<Group>\n\t\t\t<Name>Password Generator</Name>\n")
+    count = 0
+    for record in records:
+        created = _to_keepass_time(record.get("date"))
+        times = f"\t\t\t\t<Times><CreationTime>{created}</CreationTime></Times>\n" if created else ""
+        out.write("\t\t\t<Entry>\n"
+                  + string("Title", record.get("label"))
+                  + string("UserName", record.get("username"))
+                  + string("Password", record.get("password"), protect=True)
+                  + string("URL", record.get("url"))
+                  + string("Notes", record.get("notes"))
+                  + times
+                  + "\t\t\t</Entry>\n")
+        count += 1
+    out.write("\t\t</Group>\n\t</Root>\n</KeePassFile>\n")
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "keepass-xml": write_keepass_xml,
+           "bitwarden-csv": write_bitwarden_csv}
+
+
+def export_records(source, path, fmt=None, progress=None, cancel=None):
+    """Decrypt records from source (a Vault) one at a time and write them to path.
+
+    Returns the number of records written. progress and cancel work as in
+    Vault.records.
+    """
+    fmt = fmt or guess_format(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"Cannot export {fmt} files")
+    tmp = path + ".tmp"
+    try:
+        with _open_private(tmp) as out:
+            count = WRITERS[fmt](source.records(progress, cancel), out)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
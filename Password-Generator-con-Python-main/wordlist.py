@@ -0,0 +1,166 @@
+"""Memory-mapped wordlists and diceware-style passphrase generation.
+
+A wordlist is a UTF-8 text file with one word per line. Diceware/EFF style
+lines such as "11111<TAB>abacus" are accepted too; the last field is the word.
+
+The first time a wordlist is used an offset index is written next to it
+(<wordlist>.idx): a small header followed by one (start, end) pair of
+uint32 byte offsets per word. Both files are memory-mapped, so opening a
+list of hundreds of thousands of words doesn't build a Python list and
+only the pages actually touched are read from disk.
+"""
+import math
+import mmap
+import os
+import secrets
+import struct
+import sys
+from array import array
+
+import metrics
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"PGWIDX1" + (b"L" if sys.byteorder == "little" else b"B")
+# Source file size, source mtime in ns, number of words
+INDEX_HEADER = struct.Struct(">QQQ")
+INDEX_HEADER_SIZE = len(INDEX_MAGIC) + INDEX_HEADER.size
+
+# Environment variable and file name used when no wordlist is given
+WORDLIST_ENV = "PASSWORD_GENERATOR_WORDLIST"
+DEFAULT_WORDLIST = "wordlist.txt"
+
+DEFAULT_WORDS = 6
+DEFAULT_SEPARATOR = "-"
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def build_offsets(data):
+    """Scan wordlist bytes and return an array of (start, end) offsets per word."""
+    offsets = array("I")
+    pos = 0
+    size = len(data)
+    while pos < size:
+        end = data.find(b"\n", pos)
+        if end == -1:
+            end = size
+        line = data[pos:end].rstrip()
+        if line:
+            word = line.split()[-1]
+            word_end = pos + len(line)
+            offsets.append(word_end - len(word))
+            offsets.append(word_end)
+        pos = end + 1
+    return offsets
+
+
+class Wordlist:
+    """Read-only, memory-mapped wordlist addressed by word number."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = _map(path)
+        if self._data is None:
+            raise ValueError(f"Wordlist {path} is empty")
+        with metrics.timed("wordlist.open"):
+            self._offsets = self._load_index()
+        self.count = len(self._offsets) // 2
+        if self.count < 2:
+            raise ValueError(f"Wordlist {path} needs at least two words")
+
+    def _load_index(self):
+        """Map the offset index, (re)building it when missing or stale."""
+        st = os.stat(self.path)
+        index_path = self.path + INDEX_SUFFIX
+        try:
+            index = _map(index_path)
+        except OSError:
+            index = None
+        if index is not None and len(index) >= INDEX_HEADER_SIZE and index[:len(INDEX_MAGIC)] == INDEX_MAGIC:
+            size, mtime_ns, count = INDEX_HEADER.unpack_from(index, len(INDEX_MAGIC))
+            if (size, mtime_ns) == (st.st_size, st.st_mtime_ns) and \
+                    len(index) == INDEX_HEADER_SIZE + count * 2 * array("I").itemsize:
+                self._index = index
+                return memoryview(index)[INDEX_HEADER_SIZE:].cast("I")
+
+        offsets = build_offsets(self._data)
+        try:
+            tmp = index_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(INDEX_MAGIC + INDEX_HEADER.pack(st.st_size, st.st_mtime_ns, len(offsets) // 2))
+                offsets.tofile(f)
+            os.replace(tmp, index_path)
+        except OSError:
+            # Read-only location; keep the freshly built offsets in memory
+            pass
+        return offsets
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Unmap the wordlist and its index."""
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = array("I")
+        self._data.close()
+        index = getattr(self, "_index", None)
+        if index is not None:
+            index.close()
+
+    def word(self, number):
+        """Return word number `number` (0-based)."""
+        start = self._offsets[2 * number]
+        return self._data[start:self._offsets[2 * number + 1]].decode("utf-8")
+
+    @property
+    def entropy_per_word(self):
+        """Bits of entropy contributed by one uniformly chosen word."""
+        return math.log2(self.count)
+
+
+def open_wordlist(path=None):
+    """Open the given wordlist, or the one named by the environment / default file."""
+    return Wordlist(path or os.environ.get(WORDLIST_ENV) or DEFAULT_WORDLIST)
+
+
+def random_indices(n, count):
+    """Return count uniform integers in [0, n) drawn in bulk from the OS CSPRNG."""
+    if not 1 <= n <= 2 ** 32:
+        raise ValueError("Wordlist size out of range")
+    # Values at or above the largest multiple of n are rejected (no modulo bias)
+    limit = 2 ** 32 - 2 ** 32 % n
+    numbers = []
+    while len(numbers) < count:
+        missing = count - len(numbers)
+        raw = array("I", secrets.token_bytes(4 * (missing + missing // 8 + 8)))
+        numbers.extend(value % n for value in raw if value < limit)
+    del numbers[count:]
+    return numbers
+
+
+def generate_passphrases(wordlist, count, words=DEFAULT_WORDS, separator=DEFAULT_SEPARATOR):
+    """Generate count passphrases of `words` words each, from one bulk random draw."""
+    if words < 1:
+        raise ValueError("A passphrase needs at least one word")
+    with metrics.timed("generate.passphrase_batch"):
+        data = wordlist._data
+        offsets = wordlist._offsets
+        picks = random_indices(wordlist.count, count * words)
+        chosen = [data[offsets[2 * i]:offsets[2 * i + 1]] for i in picks]
+        # Join the raw bytes and decode once per passphrase rather than per word
+        sep = separator.encode("utf-8")
+        phrases = [sep.join(chosen[start:start + words]).decode("utf-8")
+                   for start in range(0, len(chosen), words)]
+    metrics.increment("generate.passphrases", count)
+    return phrases
+
+
+def generate_passphrase(wordlist, words=DEFAULT_WORDS, separator=DEFAULT_SEPARATOR):
+    """Generate a single passphrase."""
+    return generate_passphrases(wordlist, 1, words, separator)[0]